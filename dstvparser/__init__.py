@@ -1 +1,6 @@
-from .parsers.dstv_file_parser import DSTVFileParser
\ No newline at end of file
+def __getattr__(name):
+    # Import pigro: `import dstvparser` non carica i parser finché non servono
+    if name == 'DSTVFileParser':
+        from .parsers.dstv_file_parser import DSTVFileParser
+        return DSTVFileParser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,237 @@
+import math
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.parsers.batch import map_parts
+from dstvparser.parsers.table_parser import format_for_filename
+from dstvparser.utils.face_edge_schemas import FACE_EDGE_SCHEMAS
+from dstvparser.utils.geometry import slot_axis, split_contour_loops
+
+
+@dataclass
+class ClearanceViolation:
+    """Foro o asola troppo vicino (o esterno) al contorno o ai bordi della faccia"""
+    piece_id: str
+    face: str
+    feature: str      # 'hole', 'slot' ('file' per i file non parsabili)
+    index: int        # posizione in part.holes / part.slots
+    x: float
+    y: float
+    diameter: float
+    kind: str         # 'outside', 'intersects', 'too_close', 'edge', 'unparsable'
+    distance: float   # distanza tra bordo del foro e contorno/bordo, negativa se sovrapposto
+
+
+class _SegmentGrid:
+    """
+    Segmenti di contorno impaccati in array e indicizzati su griglia uniforme:
+    ogni foro interroga solo le celle vicine invece di tutti i segmenti.
+    """
+    def __init__(self, loops: List[List[Tuple[float, float]]]):
+        self.x1, self.y1 = array('d'), array('d')
+        self.x2, self.y2 = array('d'), array('d')
+        for loop in loops:
+            for (ax, ay), (bx, by) in zip(loop, loop[1:]):
+                if ax == bx and ay == by:
+                    continue
+                self.x1.append(ax)
+                self.y1.append(ay)
+                self.x2.append(bx)
+                self.y2.append(by)
+
+        n = len(self.x1)
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.rows: Dict[int, List[int]] = defaultdict(list)
+        if not n:
+            self.cell = 1.0
+            return
+        min_x = min(min(self.x1), min(self.x2))
+        max_x = max(max(self.x1), max(self.x2))
+        min_y = min(min(self.y1), min(self.y2))
+        max_y = max(max(self.y1), max(self.y2))
+        self.cell = max((max_x - min_x) + (max_y - min_y), 1.0) / max(math.sqrt(n), 1.0)
+
+        cell = self.cell
+        for i in range(n):
+            i0 = int(math.floor(min(self.x1[i], self.x2[i]) / cell))
+            i1 = int(math.floor(max(self.x1[i], self.x2[i]) / cell))
+            j0 = int(math.floor(min(self.y1[i], self.y2[i]) / cell))
+            j1 = int(math.floor(max(self.y1[i], self.y2[i]) / cell))
+            for j in range(j0, j1 + 1):
+                self.rows[j].append(i)
+                for k in range(i0, i1 + 1):
+                    self.cells[(k, j)].append(i)
+
+    def __bool__(self) -> bool:
+        return len(self.x1) > 0
+
+    def contains(self, px: float, py: float) -> bool:
+        """Point-in-polygon pari/dispari su tutti gli anelli (le IK sono vuoti)"""
+        inside = False
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        for i in self.rows.get(int(math.floor(py / self.cell)), ()):
+            ay, by = y1[i], y2[i]
+            if (ay > py) != (by > py):
+                cross_x = x1[i] + (py - ay) * (x2[i] - x1[i]) / (by - ay)
+                if cross_x > px:
+                    inside = not inside
+        return inside
+
+    def nearest(self, ax: float, ay: float, bx: float, by: float, reach: float) -> float:
+        """Distanza minima tra il segmento (a, b) e i segmenti entro `reach`; inf se nessuno"""
+        cell = self.cell
+        i0 = int(math.floor((min(ax, bx) - reach) / cell))
+        i1 = int(math.floor((max(ax, bx) + reach) / cell))
+        j0 = int(math.floor((min(ay, by) - reach) / cell))
+        j1 = int(math.floor((max(ay, by) + reach) / cell))
+        seen = set()
+        best = math.inf
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        for j in range(j0, j1 + 1):
+            for k in range(i0, i1 + 1):
+                for i in self.cells.get((k, j), ()):
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    d = _segment_distance(ax, ay, bx, by, x1[i], y1[i], x2[i], y2[i])
+                    if d < best:
+                        best = d
+        return best
+
+    def nearest_any(self, ax: float, ay: float, bx: float, by: float) -> float:
+        """Distanza minima su tutti i segmenti (caso raro: feature fuori dal contorno)"""
+        return min(_segment_distance(ax, ay, bx, by, self.x1[i], self.y1[i], self.x2[i], self.y2[i])
+                   for i in range(len(self.x1)))
+
+
+def _point_segment_distance(px, py, ax, ay, bx, by) -> float:
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _segment_distance(ax, ay, bx, by, cx, cy, dx, dy) -> float:
+    """Distanza tra due segmenti (0 se si intersecano)"""
+    d1 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    d2 = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+    d3 = (dx - cx) * (ay - cy) - (dy - cy) * (ax - cx)
+    d4 = (dx - cx) * (by - cy) - (dy - cy) * (bx - cx)
+    if ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and d1 and d2 and d3 and d4:
+        return 0.0
+    return min(
+        _point_segment_distance(ax, ay, cx, cy, dx, dy),
+        _point_segment_distance(bx, by, cx, cy, dx, dy),
+        _point_segment_distance(cx, cy, ax, ay, bx, by),
+        _point_segment_distance(dx, dy, ax, ay, bx, by),
+    )
+
+
+def _features_by_face(part: NCPart):
+    """Fori e asole come capsule (asse a-b, raggio), raggruppati per faccia"""
+    by_face = defaultdict(list)
+    for i, hole in enumerate(part.holes):
+        by_face[hole.face].append(('hole', i, hole.x, hole.y, hole.x, hole.y, hole.diameter))
+    for i, slot in enumerate(part.slots):
+        by_face[slot.face].append(('slot', i, *slot_axis(slot), slot.diameter))
+    return by_face
+
+
+def check_part_clearance(part: NCPart, min_contour_clearance: float = 0.0,
+                         min_edge_clearance: float = 0.0) -> List[ClearanceViolation]:
+    """
+    Controlla fori e asole di una parte rispetto al contorno AK/IK della
+    propria faccia e ai bordi ricavati da `dimensions`.
+
+    Args:
+        part: parte parsata
+        min_contour_clearance: distanza minima tra bordo del foro e contorno
+        min_edge_clearance: distanza minima tra bordo del foro e bordi della faccia
+    Returns:
+        List[ClearanceViolation]: le violazioni trovate
+    """
+    if part is None:
+        return []
+    violations = []
+    contours = {'o': part.o_contour, 'u': part.u_contour, 'v': part.v_contour, 'h': part.h_contour}
+    edge_schema = FACE_EDGE_SCHEMAS.get(part.profile_type, {})
+
+    for face, features in _features_by_face(part).items():
+        grid = _SegmentGrid(split_contour_loops(contours.get(face, [])))
+        width_field, margin_field = edge_schema.get(face, (None, None))
+        width = part.dimensions.get(width_field) if width_field else None
+        margin = part.dimensions.get(margin_field, 0.0) if margin_field else 0.0
+        # Con un contorno presente i bordi esterni sono già coperti: restano le fasce non forabili
+        check_edges = width is not None and (not grid or margin > 0)
+
+        for feature, index, ax, ay, bx, by, diameter in features:
+            radius = diameter / 2.0
+            found = []
+            if grid:
+                if not (grid.contains(ax, ay) and grid.contains(bx, by)):
+                    found.append(('outside', -(grid.nearest_any(ax, ay, bx, by) + radius)))
+                else:
+                    reach = radius + max(min_contour_clearance, 0.0)
+                    d = grid.nearest(ax, ay, bx, by, reach) - radius
+                    if d < 0:
+                        found.append(('intersects', d))
+                    elif d < min_contour_clearance:
+                        found.append(('too_close', d))
+            if check_edges:
+                low_y, high_y = min(ay, by) - radius, max(ay, by) + radius
+                distances = [low_y - margin, (width - margin) - high_y]
+                if not grid:
+                    distances += [min(ax, bx) - radius, part.length - (max(ax, bx) + radius)]
+                d = min(distances)
+                if d < min_edge_clearance:
+                    found.append(('edge', d))
+            for kind, distance in found:
+                violations.append(ClearanceViolation(
+                    piece_id=part.piece_id, face=face, feature=feature, index=index,
+                    x=ax, y=ay, diameter=diameter, kind=kind, distance=round(distance, 3),
+                ))
+    return violations
+
+
+def _check_parsed(part: Optional[NCPart], min_contour_clearance: float,
+                  min_edge_clearance: float) -> Optional[List[ClearanceViolation]]:
+    """Nel worker: None se il file non è parsabile, per distinguerlo da una parte senza violazioni"""
+    if part is None:
+        return None
+    return check_part_clearance(part, min_contour_clearance, min_edge_clearance)
+
+
+def _is_supported(path: str) -> bool:
+    try:
+        format_for_filename(path)
+        return True
+    except ValueError:
+        return False
+
+
+def check_job_clearance(paths: Iterable[Union[str, Path]], min_contour_clearance: float = 0.0,
+                        min_edge_clearance: float = 0.0, max_workers: Optional[int] = None
+                        ) -> Dict[str, List[ClearanceViolation]]:
+    """
+    Esegue il controllo su tutti i file di una commessa in parallelo; restituisce solo i file con violazioni.
+    Un file non parsabile (anche per estensione non supportata) non blocca il job: compare con
+    un'unica violazione 'unparsable', perché non è stato possibile controllarlo.
+    """
+    paths = [str(p) for p in paths]
+    check = partial(_check_parsed, min_contour_clearance=min_contour_clearance,
+                    min_edge_clearance=min_edge_clearance)
+    checked = dict(map_parts(check, [p for p in paths if _is_supported(p)], max_workers=max_workers))
+    results = {}
+    for path in paths:
+        found = checked.get(path)
+        if found is None:
+            results[path] = [ClearanceViolation(piece_id='', face='', feature='file', index=-1, x=0.0, y=0.0,
+                                                diameter=0.0, kind='unparsable', distance=0.0)]
+        elif found:
+            results[path] = found
+    return results
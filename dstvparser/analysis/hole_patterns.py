@@ -0,0 +1,266 @@
+import hashlib
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from dstvparser.models.nc_part import Hole, NCPart
+from dstvparser.parsers.batch import map_parts
+
+PATTERN_KINDS = ('single', 'row', 'column', 'grid', 'irregular')
+
+
+@dataclass
+class HolePattern:
+    """
+    Gruppo di fori (bullonatura) riconosciuto su una faccia.
+
+    `row` sono fori allineati lungo x, `column` lungo y, `grid` una griglia
+    completa con passo costante; gli altri gruppi sono `irregular`.
+    """
+    face: str
+    diameter: float
+    kind: str
+    columns: int                       # posizioni distinte lungo x
+    rows: int                          # posizioni distinte lungo y (linee di truschino)
+    pitch_x: Optional[float]           # passo lungo x (None se uno solo o non costante)
+    pitch_y: Optional[float]
+    origin: Tuple[float, float]        # foro in basso a sinistra
+    gauges: Tuple[float, ...]          # quote y delle file di fori
+    holes: List[int] = field(default_factory=list)   # indici in part.holes
+    signature: str = ''
+
+
+def _quantize(value: float, tolerance: float) -> float:
+    """
+    Valore nominale per la firma: il multiplo di 2*tolleranza più vicino.
+
+    Tutti i valori entro ±tolleranza dallo stesso nominale (es. passo 69.6-70.4
+    con tolleranza 0.5) danno la stessa firma; due valori vicini ma a cavallo
+    del limite tra due nominali (70.4 e 70.6) restano distinti.
+    """
+    if tolerance <= 0:
+        return round(value, 6)
+    step = 2 * tolerance
+    return round(math.floor(value / step + 0.5) * step, 6)
+
+
+def _fmt(value: float) -> str:
+    return f"{value:g}"
+
+
+def _cluster(values: List[float], tolerance: float) -> List[List[float]]:
+    """Gruppi di valori ordinati, separati dove due valori consecutivi distano più della tolleranza"""
+    ordered = sorted(values)
+    groups = [[ordered[0]]]
+    for v in ordered[1:]:
+        if v - groups[-1][-1] > tolerance:
+            groups.append([v])
+        else:
+            groups[-1].append(v)
+    return groups
+
+
+def _cluster_positions(values: List[float], tolerance: float) -> List[float]:
+    """Valori distinti: la media di ogni gruppo"""
+    return [sum(g) / len(g) for g in _cluster(values, tolerance)]
+
+
+def _constant_pitch(positions: List[float], tolerance: float) -> Optional[float]:
+    """Passo medio se tutte le distanze consecutive sono uguali entro la tolleranza"""
+    if len(positions) < 2:
+        return None
+    steps = [b - a for a, b in zip(positions, positions[1:])]
+    mean = sum(steps) / len(steps)
+    return mean if all(abs(s - mean) <= tolerance for s in steps) else None
+
+
+def _group_holes(holes: List[Tuple[int, Hole]], max_gap: float) -> List[List[Tuple[int, Hole]]]:
+    """
+    Componenti connesse dei fori a distanza <= max_gap: ogni foro è messo in
+    una cella di lato max_gap e confrontato solo con le 9 celle vicine.
+    """
+    parent = list(range(len(holes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i, (_, hole) in enumerate(holes):
+        cells[(int(math.floor(hole.x / max_gap)), int(math.floor(hole.y / max_gap)))].append(i)
+    limit = max_gap * max_gap
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                others = cells.get((cx + dx, cy + dy))
+                if not others:
+                    continue
+                for i in members:
+                    xi, yi = holes[i][1].x, holes[i][1].y
+                    for j in others:
+                        if j <= i:
+                            continue
+                        xj, yj = holes[j][1].x, holes[j][1].y
+                        if (xi - xj) ** 2 + (yi - yj) ** 2 <= limit:
+                            ri, rj = find(i), find(j)
+                            if ri != rj:
+                                parent[rj] = ri
+
+    groups: Dict[int, List[Tuple[int, Hole]]] = defaultdict(list)
+    for i, item in enumerate(holes):
+        groups[find(i)].append(item)
+    return list(groups.values())
+
+
+def _fit_pattern(face: str, diameter: float, members: List[Tuple[int, Hole]], tolerance: float,
+                 include_gauges: bool) -> HolePattern:
+    xs = _cluster_positions([h.x for _, h in members], tolerance)
+    ys = _cluster_positions([h.y for _, h in members], tolerance)
+    pitch_x = _constant_pitch(xs, tolerance)
+    pitch_y = _constant_pitch(ys, tolerance)
+    full = len(members) == len(xs) * len(ys)
+
+    if len(members) == 1:
+        kind = 'single'
+    elif len(ys) == 1 and pitch_x is not None:
+        kind = 'row'
+    elif len(xs) == 1 and pitch_y is not None:
+        kind = 'column'
+    elif full and pitch_x is not None and pitch_y is not None:
+        kind = 'grid'
+    else:
+        kind = 'irregular'
+
+    q = partial(_quantize, tolerance=tolerance)
+    gauges = tuple(q(y) for y in ys)
+    parts = [kind, face, f"d{_fmt(diameter)}", f"{len(xs)}x{len(ys)}"]
+    if kind == 'irregular':
+        # Offset relativi al foro in basso a sinistra, ordinati: invarianti alla traslazione
+        ox, oy = xs[0], ys[0]
+        offsets = sorted((q(h.x - ox), q(h.y - oy)) for _, h in members)
+        digest = hashlib.blake2b(repr(offsets).encode('ascii'), digest_size=6).hexdigest()
+        parts.append(f"n{len(members)}:{digest}")
+    else:
+        parts.append(f"p{_fmt(q(pitch_x)) if pitch_x else '-'}x{_fmt(q(pitch_y)) if pitch_y else '-'}")
+    if include_gauges:
+        parts.append('g' + ','.join(_fmt(g) for g in gauges))
+
+    return HolePattern(
+        face=face, diameter=diameter, kind=kind, columns=len(xs), rows=len(ys),
+        pitch_x=pitch_x, pitch_y=pitch_y, origin=(xs[0], ys[0]), gauges=gauges,
+        holes=sorted(i for i, _ in members), signature=':'.join(parts),
+    )
+
+
+def recognize_patterns(part: NCPart, max_gap: float = 150.0, tolerance: float = 0.5,
+                       include_gauges: bool = True) -> List[HolePattern]:
+    """
+    Riconosce i gruppi di fori di una parte, per faccia e diametro.
+
+    Args:
+        part: parte parsata
+        max_gap: distanza massima tra due fori vicini dello stesso gruppo
+        tolerance: tolleranza su posizioni e passi (e quantizzazione della firma)
+        include_gauges: include nella firma le quote y delle file (linee di truschino);
+            senza, la firma dipende solo dalla forma del gruppo
+    Returns:
+        List[HolePattern]: gruppi ordinati per faccia e posizione
+    """
+    if max_gap <= 0:
+        raise ValueError(f"max_gap deve essere positivo: {max_gap}")
+    if part is None:
+        return []
+    # I diametri sono valori nominali scritti dal CAD: la tolleranza vale solo per posizioni e passi
+    by_face: Dict[Tuple[str, float], List[Tuple[int, Hole]]] = defaultdict(list)
+    for i, hole in enumerate(part.holes):
+        by_face[(hole.face, round(hole.diameter, 6))].append((i, hole))
+
+    patterns = []
+    for (face, diameter), holes in by_face.items():
+        for members in _group_holes(holes, max_gap):
+            patterns.append(_fit_pattern(face, diameter, members, tolerance, include_gauges))
+    patterns.sort(key=lambda p: (p.face, p.origin[0], p.origin[1], p.diameter))
+    return patterns
+
+
+def gauge_lines(part: NCPart, tolerance: float = 0.5, min_holes: int = 2) -> Dict[str, List[Tuple[float, int]]]:
+    """Linee di truschino per faccia: quote y con almeno `min_holes` fori, con il numero di fori"""
+    by_face: Dict[str, List[float]] = defaultdict(list)
+    for hole in part.holes:
+        by_face[hole.face].append(hole.y)
+    return {face: [(_quantize(sum(g) / len(g), tolerance), len(g)) for g in _cluster(ys, tolerance)
+                   if len(g) >= min_holes]
+            for face, ys in by_face.items()}
+
+
+class PatternIndex:
+    """
+    Indice delle firme dei gruppi di fori di una commessa: firma -> parti che la contengono.
+
+    Esempio:
+        index = PatternIndex.from_patterns(recognize_job(iter_dstv_files("job")))
+        for signature, keys in index.shared().items():
+            print(signature, len(keys))
+    """
+    def __init__(self):
+        self._by_signature: Dict[str, Set[str]] = defaultdict(set)
+        self._patterns: Dict[str, List[HolePattern]] = {}
+
+    @classmethod
+    def from_patterns(cls, results: Mapping[str, List[HolePattern]]) -> 'PatternIndex':
+        index = cls()
+        for key, patterns in results.items():
+            index.add(key, patterns)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, key: str, patterns: List[HolePattern]):
+        """Aggiunge (o sostituisce) i gruppi di una parte"""
+        self.remove(key)
+        self._patterns[key] = patterns
+        for pattern in patterns:
+            self._by_signature[pattern.signature].add(key)
+
+    def remove(self, key: str):
+        for pattern in self._patterns.pop(key, []):
+            keys = self._by_signature[pattern.signature]
+            keys.discard(key)
+            if not keys:
+                del self._by_signature[pattern.signature]
+
+    def patterns(self, key: str) -> List[HolePattern]:
+        return self._patterns.get(key, [])
+
+    def parts_with(self, signature: str) -> List[str]:
+        return sorted(self._by_signature.get(signature, ()))
+
+    def similar_parts(self, key: str) -> Dict[str, int]:
+        """Altre parti con almeno un gruppo in comune, con il numero di firme condivise"""
+        shared: Dict[str, int] = defaultdict(int)
+        for signature in {p.signature for p in self.patterns(key)}:
+            for other in self._by_signature[signature]:
+                if other != key:
+                    shared[other] += 1
+        return dict(sorted(shared.items(), key=lambda item: (-item[1], item[0])))
+
+    def counts(self) -> Dict[str, int]:
+        """Numero di parti per firma"""
+        return {signature: len(keys) for signature, keys in self._by_signature.items()}
+
+    def shared(self, min_parts: int = 2) -> Dict[str, List[str]]:
+        """Firme presenti in almeno `min_parts` parti"""
+        return {signature: sorted(keys) for signature, keys in self._by_signature.items() if len(keys) >= min_parts}
+
+
+def recognize_job(paths: Iterable[Union[str, Path]], max_gap: float = 150.0, tolerance: float = 0.5,
+                  include_gauges: bool = True, max_workers: Optional[int] = None) -> Dict[str, List[HolePattern]]:
+    """Riconosce in parallelo i gruppi di fori di tutti i file di una commessa; restituisce solo i file con fori"""
+    recognize = partial(recognize_patterns, max_gap=max_gap, tolerance=tolerance, include_gauges=include_gauges)
+    return {path: patterns for path, patterns in map_parts(recognize, paths, max_workers=max_workers) if patterns}
@@ -0,0 +1,224 @@
+import hashlib
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from dstvparser.models.nc_part import Hole, NCPart, Slot
+from dstvparser.parsers.batch import iter_dstv_files, parse_file
+
+FACES = ('o', 'u', 'v', 'h')
+
+
+@dataclass
+class PartDiff:
+    """Differenze strutturali tra due revisioni della stessa parte"""
+    old_path: str
+    new_path: str
+    piece_id: str
+    header_changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    dimension_changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    holes_added: List[Hole] = field(default_factory=list)
+    holes_removed: List[Hole] = field(default_factory=list)
+    slots_added: List[Slot] = field(default_factory=list)
+    slots_removed: List[Slot] = field(default_factory=list)
+    contour_changes: Dict[str, Dict[str, List[Tuple[float, float, float]]]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def has_changes(self) -> bool:
+        return bool(self.header_changes or self.dimension_changes or self.holes_added or self.holes_removed
+                    or self.slots_added or self.slots_removed or self.contour_changes or self.error)
+
+
+@dataclass
+class JobDiff:
+    """Confronto tra due revisioni di una commessa"""
+    unchanged: List[str] = field(default_factory=list)   # stesso contenuto (hash) o nessuna differenza strutturale
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[PartDiff] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON"""
+        return {
+            'unchanged': self.unchanged,
+            'added': self.added,
+            'removed': self.removed,
+            'changed': [asdict(d) for d in self.changed],
+        }
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """Hash del contenuto di un file"""
+    with open(path, 'rb') as file:
+        return hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    return abs(a - b) <= tolerance
+
+
+def match_with_tolerance(old: Sequence[Any], new: Sequence[Any], key, tolerance: float) -> Tuple[List[Any], List[Any]]:
+    """
+    Accoppia elementi che coincidono entro la tolleranza tramite hash su griglia.
+
+    `key(item)` restituisce (chiave_esatta, valori_numerici): gli elementi
+    vengono messi in celle di lato `tolerance` e ogni elemento nuovo cerca
+    solo nelle celle adiacenti, quindi il costo è lineare e non O(n²).
+    Le celle usano floor e non round (che arrotonda le metà al pari): due
+    valori a distanza pari alla tolleranza cadono sempre in celle adiacenti.
+
+    Returns:
+        Tuple[List, List]: (aggiunti, rimossi)
+    """
+    step = tolerance if tolerance > 0 else 1e-9
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    old_keys = [key(item) for item in old]
+    for i, (exact, values) in enumerate(old_keys):
+        buckets[(exact,) + tuple(math.floor(v / step) for v in values)].append(i)
+
+    used = [False] * len(old)
+    added = []
+    for item in new:
+        exact, values = key(item)
+        cell = tuple(math.floor(v / step) for v in values)
+        match = -1
+        for offset in _neighbour_offsets(len(cell)):
+            for i in buckets.get((exact,) + tuple(c + o for c, o in zip(cell, offset)), ()):
+                if not used[i] and all(_close(a, b, tolerance) for a, b in zip(old_keys[i][1], values)):
+                    match = i
+                    break
+            if match >= 0:
+                break
+        if match >= 0:
+            used[match] = True
+        else:
+            added.append(item)
+    removed = [item for i, item in enumerate(old) if not used[i]]
+    return added, removed
+
+
+_OFFSETS_CACHE: Dict[int, List[Tuple[int, ...]]] = {}
+
+
+def _neighbour_offsets(dimensions: int) -> List[Tuple[int, ...]]:
+    """Offset delle celle adiacenti, cella centrale per prima"""
+    if dimensions not in _OFFSETS_CACHE:
+        offsets = [()]
+        for _ in range(dimensions):
+            offsets = [o + (d,) for o in offsets for d in (0, -1, 1)]
+        _OFFSETS_CACHE[dimensions] = offsets
+    return _OFFSETS_CACHE[dimensions]
+
+
+def _hole_key(hole: Hole):
+    return hole.face, (hole.x, hole.y, hole.diameter)
+
+
+def _slot_key(slot: Slot):
+    return slot.face, (slot.x, slot.y, slot.diameter, slot.cc_distance, slot.height, slot.angle)
+
+
+def _point_key(point: Tuple[float, float, float]):
+    return None, point
+
+
+def diff_parts(old: NCPart, new: NCPart, tolerance: float = 0.01, old_path: str = '', new_path: str = '') -> PartDiff:
+    """Calcola le differenze per feature tra due revisioni di una parte"""
+    diff = PartDiff(old_path=old_path, new_path=new_path, piece_id=(new or old).piece_id if (new or old) else '')
+    if old is None or new is None:
+        diff.error = f"Parsing fallito: {old_path if old is None else new_path}"
+        return diff
+
+    old_header, new_header = old.get_header(), new.get_header()
+    for name, value in new_header.items():
+        before = old_header.get(name)
+        if isinstance(value, float) and isinstance(before, float):
+            if not _close(before, value, tolerance):
+                diff.header_changes[name] = (before, value)
+        elif before != value:
+            diff.header_changes[name] = (before, value)
+
+    for name in sorted(set(old.dimensions) | set(new.dimensions)):
+        before, after = old.dimensions.get(name), new.dimensions.get(name)
+        if before is None or after is None or not _close(before, after, tolerance):
+            diff.dimension_changes[name] = (before, after)
+
+    diff.holes_added, diff.holes_removed = match_with_tolerance(old.holes, new.holes, _hole_key, tolerance)
+    diff.slots_added, diff.slots_removed = match_with_tolerance(old.slots, new.slots, _slot_key, tolerance)
+
+    for face in FACES:
+        old_points, new_points = getattr(old, f"{face}_contour"), getattr(new, f"{face}_contour")
+        if old_points == new_points:
+            continue
+        added, removed = match_with_tolerance(old_points, new_points, _point_key, tolerance)
+        if added or removed:
+            diff.contour_changes[face] = {'added': added, 'removed': removed}
+    return diff
+
+
+def _diff_paths(paths: Tuple[str, str, float]) -> PartDiff:
+    old_path, new_path, tolerance = paths
+    return diff_parts(parse_file(old_path), parse_file(new_path), tolerance, old_path, new_path)
+
+
+def _piece_ids(paths: Iterable[str]) -> Dict[str, str]:
+    """piece_id -> percorso, per i file non accoppiati per nome"""
+    result = {}
+    for path in paths:
+        part = parse_file(path)
+        if part is not None and part.piece_id not in result:
+            result[part.piece_id] = path
+    return result
+
+
+def diff_job_folders(old_folder: Union[str, Path], new_folder: Union[str, Path], tolerance: float = 0.01,
+                     recursive: bool = False, max_workers: Optional[int] = None, chunksize: int = 32) -> JobDiff:
+    """
+    Confronta due revisioni di una commessa.
+
+    I file sono accoppiati per nome; quelli rimasti senza corrispondenza
+    vengono accoppiati per piece_id (file rinominati). Le coppie con lo
+    stesso hash del contenuto non vengono parsate; le altre sono confrontate
+    in parallelo in un pool di processi.
+    """
+    old_files = {p.relative_to(old_folder).as_posix(): str(p) for p in iter_dstv_files(old_folder, recursive)}
+    new_files = {p.relative_to(new_folder).as_posix(): str(p) for p in iter_dstv_files(new_folder, recursive)}
+
+    pairs = [(old_files[name], new_files[name]) for name in sorted(old_files.keys() & new_files.keys())]
+    old_only = [old_files[name] for name in sorted(old_files.keys() - new_files.keys())]
+    new_only = [new_files[name] for name in sorted(new_files.keys() - old_files.keys())]
+
+    if old_only and new_only:
+        old_ids, new_ids = _piece_ids(old_only), _piece_ids(new_only)
+        for piece_id in sorted(old_ids.keys() & new_ids.keys()):
+            pairs.append((old_ids[piece_id], new_ids[piece_id]))
+            old_only.remove(old_ids[piece_id])
+            new_only.remove(new_ids[piece_id])
+
+    job = JobDiff(added=new_only, removed=old_only)
+    to_parse = []
+    for old_path, new_path in pairs:
+        if file_hash(old_path) == file_hash(new_path):
+            job.unchanged.append(new_path)
+        else:
+            to_parse.append((old_path, new_path, tolerance))
+
+    if max_workers == 1 or len(to_parse) <= 1:
+        diffs = map(_diff_paths, to_parse)
+        _collect(job, diffs)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            _collect(job, executor.map(_diff_paths, to_parse, chunksize=chunksize))
+    return job
+
+
+def _collect(job: JobDiff, diffs: Iterable[PartDiff]):
+    for diff in diffs:
+        if diff.has_changes():
+            job.changed.append(diff)
+        else:
+            job.unchanged.append(diff.new_path)
@@ -0,0 +1,250 @@
+"""
+Comando `dstv`: scan, headers, summary, classify ed export su file o cartelle DSTV.
+
+Gli import dei parser e del pool di processi sono fatti dentro i comandi,
+così `dstv headers one.nc` chiamato migliaia di volte da una pipeline
+carica solo lo stretto necessario; per questa forma (un solo file, senza
+opzioni) anche argparse viene saltato.
+"""
+import os
+import sys
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+OUTPUT_FORMATS = ('json', 'jsonl', 'csv')
+CLASSIFY_KEYS = ('code_profile', 'profile_type', 'material', 'skew', 'features')
+
+
+def _collect_paths(inputs: Iterable[str], recursive: bool) -> List[str]:
+    """Espande le cartelle nei file .nc/.nc1 contenuti; i file indicati esplicitamente restano tali"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            from dstvparser.parsers.batch import iter_dstv_files
+            paths.extend(str(p) for p in iter_dstv_files(item, recursive))
+        else:
+            paths.append(item)
+    return paths
+
+
+def _run(func, paths: List[str], workers: Optional[int]) -> Iterator[Tuple[str, object]]:
+    """(percorso, func(parte)) nell'ordine di `paths`; i file con estensione non supportata danno None"""
+    from dstvparser.parsers.table_parser import format_for_filename
+    supported = []
+    for path in paths:
+        try:
+            format_for_filename(path)
+            supported.append(path)
+        except ValueError:
+            pass
+    if len(paths) == 1:
+        # Percorso rapido per il singolo file: niente pool né pathlib
+        if not supported:
+            return iter([(paths[0], None)])
+        from dstvparser.parsers.factory import NCFileParserFactory
+        return iter([(paths[0], func(NCFileParserFactory.create_parser(paths[0]).parse()))])
+    from dstvparser.parsers.batch import map_parts
+    results = map_parts(func, supported, max_workers=workers)
+    if len(supported) == len(paths):
+        return results
+    supported_set = set(supported)
+    return ((path, None) if path not in supported_set else next(results) for path in paths)
+
+
+# Funzioni eseguite nei worker: devono restare a livello di modulo (picklable)
+
+def _header(part):
+    return None if part is None else part.get_header()
+
+
+def _summary(part):
+    if part is None:
+        return None
+    from dstvparser.utils.serialization import part_to_dict
+    return part_to_dict(part, 'summary')
+
+
+def _full(part):
+    if part is None:
+        return None
+    from dstvparser.utils.serialization import part_to_dict
+    return part_to_dict(part, 'full')
+
+
+def _scan_record(part):
+    if part is None:
+        return None
+    return {'code_profile': part.code_profile, 'material': part.material, 'profile_type': part.profile_type,
+            'quantity': part.quantity, 'length': part.length}
+
+
+def classify_part(part, by: str = 'code_profile') -> Optional[str]:
+    """Classe di una parte secondo il criterio `by` (vedi CLASSIFY_KEYS)"""
+    if part is None:
+        return None
+    if by == 'skew':
+        return 'inclined' if part.flange_skew_cut() or part.web_skew_cut() else 'straight'
+    if by == 'features':
+        labels = [name for name, present in (('holes', part.has_holes()), ('slots', part.has_slots()),
+                                             ('worked', part.has_worked_areas())) if present]
+        return '+'.join(labels) or 'plain'
+    return str(getattr(part, by))
+
+
+def class_folder(label: str) -> str:
+    """Nome di sottocartella per una classe; le classi vuote (es. campo header mancante) finiscono in '_senza_classe'"""
+    name = label.strip().replace('/', '_').replace('\\', '_')
+    return '_senza_classe' if name in ('', '.', '..') else name
+
+
+def _flatten(record: Dict) -> Dict:
+    """Appiattisce i dizionari annidati per l'output CSV (es. dimensions.flange_width)"""
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}.{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+
+def _write(records: List[Dict], fmt: str, output: Optional[str]):
+    import json
+    stream = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    try:
+        if fmt == 'json':
+            json.dump(records, stream, indent=2, ensure_ascii=False)
+            stream.write('\n')
+        elif fmt == 'jsonl':
+            for record in records:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            import csv
+            rows = [_flatten(r) for r in records]
+            fields: Dict[str, None] = {}
+            for row in rows:
+                fields.update(dict.fromkeys(row))
+            writer = csv.DictWriter(stream, fieldnames=list(fields))
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if output:
+            stream.close()
+
+
+def _per_file(func, args) -> Tuple[List[Dict], int]:
+    records, failed = [], 0
+    for path, result in _run(func, _collect_paths(args.paths, args.recursive), args.workers):
+        if result is None:
+            failed += 1
+            print(f"Parsing fallito: {path}", file=sys.stderr)
+            continue
+        records.append({'file': path, **result})
+    return records, failed
+
+
+def cmd_headers(args) -> int:
+    records, failed = _per_file(_header, args)
+    _write(records, args.format, args.output)
+    return 1 if failed else 0
+
+
+def cmd_summary(args) -> int:
+    records, failed = _per_file(_summary, args)
+    _write(records, args.format, args.output)
+    return 1 if failed else 0
+
+
+def cmd_scan(args) -> int:
+    """Raggruppa per sezione e materiale: numero di file, pezzi e lunghezza totale"""
+    groups: Dict[Tuple[str, str], Dict] = {}
+    failed = 0
+    for path, record in _run(_scan_record, _collect_paths(args.paths, args.recursive), args.workers):
+        if record is None:
+            failed += 1
+            print(f"Parsing fallito: {path}", file=sys.stderr)
+            continue
+        key = (record['code_profile'], record['material'])
+        group = groups.setdefault(key, {'code_profile': key[0], 'material': key[1],
+                                        'profile_type': record['profile_type'],
+                                        'files': 0, 'pieces': 0, 'total_length': 0.0})
+        group['files'] += 1
+        group['pieces'] += record['quantity']
+        group['total_length'] += record['length'] * record['quantity']
+    _write(sorted(groups.values(), key=lambda g: (g['code_profile'], g['material'])), args.format, args.output)
+    return 1 if failed else 0
+
+
+def cmd_classify(args) -> int:
+    records, failed = [], 0
+    for path, label in _run(partial(classify_part, by=args.by), _collect_paths(args.paths, args.recursive),
+                            args.workers):
+        if label is None:
+            failed += 1
+            print(f"Parsing fallito: {path}", file=sys.stderr)
+            continue
+        records.append({'file': path, 'class': label})
+        if args.copy_to:
+            import shutil
+            target = os.path.join(args.copy_to, class_folder(label))
+            os.makedirs(target, exist_ok=True)
+            shutil.copy2(path, os.path.join(target, os.path.basename(path)))
+    _write(records, args.format, args.output)
+    return 1 if failed else 0
+
+
+def cmd_export(args) -> int:
+    records, failed = _per_file(_full, args)
+    if args.format == 'csv':
+        # In CSV una riga per foro/asola: la geometria completa non sta in colonne fisse
+        rows = []
+        for record in records:
+            base = {'file': record['file'], 'piece_id': record['piece_id'], 'code_profile': record['code_profile']}
+            rows.extend({**base, 'feature': 'hole', **hole} for hole in record['holes'])
+            rows.extend({**base, 'feature': 'slot', **slot} for slot in record['slots'])
+        records = rows
+    _write(records, args.format, args.output)
+    return 1 if failed else 0
+
+
+def build_parser() -> 'argparse.ArgumentParser':
+    import argparse
+    parser = argparse.ArgumentParser(prog='dstv', description="Strumenti a riga di comando per file DSTV (.nc/.nc1)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('paths', nargs='+', help="file o cartelle DSTV")
+    common.add_argument('-r', '--recursive', action='store_true', help="cerca anche nelle sottocartelle")
+    common.add_argument('-j', '--workers', type=int, default=None, help="processi paralleli (default: numero di core)")
+    common.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='json')
+    common.add_argument('-o', '--output', default=None, help="file di uscita (default: stdout)")
+
+    subparsers.add_parser('scan', parents=[common], help="riepilogo per sezione e materiale").set_defaults(func=cmd_scan)
+    subparsers.add_parser('headers', parents=[common], help="intestazione di ogni file").set_defaults(func=cmd_headers)
+    subparsers.add_parser('summary', parents=[common], help="intestazione, dimensioni e lavorazioni").set_defaults(func=cmd_summary)
+    classify = subparsers.add_parser('classify', parents=[common], help="classifica i file per criterio")
+    classify.add_argument('--by', choices=CLASSIFY_KEYS, default='code_profile')
+    classify.add_argument('--copy-to', default=None, help="copia i file in sottocartelle per classe")
+    classify.set_defaults(func=cmd_classify)
+    subparsers.add_parser('export', parents=[common], help="geometria completa (CSV: una riga per foro/asola)").set_defaults(func=cmd_export)
+    return parser
+
+
+def _fast_headers_args(argv: List[str]):
+    """Argomenti di `dstv headers <file>` senza passare da argparse; None per ogni altra forma"""
+    if len(argv) != 2 or argv[0] != 'headers' or argv[1].startswith('-') or not os.path.isfile(argv[1]):
+        return None
+    from types import SimpleNamespace
+    return SimpleNamespace(command='headers', paths=[argv[1]], recursive=False, workers=None,
+                           format='json', output=None, func=cmd_headers)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = _fast_headers_args(argv) or build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
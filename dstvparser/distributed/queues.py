@@ -0,0 +1,259 @@
+"""
+Code di lavoro condivise tra i nodi di una scansione distribuita.
+
+Un chunk passa da 'pending' a 'claimed' (con una lease) e poi a 'done'.
+Se un worker si ferma, allo scadere della lease il chunk torna 'pending'
+e viene ripreso da un altro; dopo `max_attempts` errori finisce in 'failed'.
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+QUEUE_STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+class WorkQueue:
+    """Interfaccia delle code: le implementazioni devono rendere claim atomico tra processi e nodi"""
+    def submit(self, chunk_ids: Iterable[str]) -> int:
+        """Aggiunge i chunk non ancora presenti (idempotente); restituisce quanti ne ha aggiunti"""
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease: float) -> Optional[str]:
+        """Prende un chunk in attesa per `lease` secondi; None se non ce ne sono"""
+        raise NotImplementedError
+
+    def renew(self, chunk_id: str, worker_id: str, lease: float) -> bool:
+        """Prolunga la lease di un chunk ancora assegnato al worker"""
+        raise NotImplementedError
+
+    def complete(self, chunk_id: str, worker_id: str):
+        raise NotImplementedError
+
+    def fail(self, chunk_id: str, worker_id: str, error: str):
+        """Rimette il chunk in coda, o lo segna 'failed' dopo troppi tentativi"""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Rimette in coda i chunk con la lease scaduta; restituisce quanti"""
+        raise NotImplementedError
+
+    def progress(self) -> Dict[str, int]:
+        """Numero di chunk per stato"""
+        raise NotImplementedError
+
+
+class FilesystemQueue(WorkQueue):
+    """
+    Coda su cartella condivisa: un file per chunk nella sottocartella del suo
+    stato. La presa in carico è un os.rename da pending/ a claimed/, atomico
+    sullo stesso filesystem: se due worker provano insieme, uno solo riesce.
+    La scadenza della lease è salvata come mtime del file in claimed/.
+    """
+    def __init__(self, root: Union[str, Path], max_attempts: int = 3):
+        self.root = Path(root)
+        self.max_attempts = max_attempts
+        for state in QUEUE_STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _claimed_name(self, chunk_id: str, worker_id: str) -> Path:
+        return self.root / 'claimed' / f"{chunk_id}@{worker_id}"
+
+    @staticmethod
+    def _attempts(path: Path) -> int:
+        try:
+            return int(path.read_text() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _known(self) -> set:
+        known = set()
+        for state in QUEUE_STATES:
+            known.update(name.split('@')[0] for name in os.listdir(self.root / state))
+        return known
+
+    def submit(self, chunk_ids: Iterable[str]) -> int:
+        known = self._known()
+        added = 0
+        for chunk_id in chunk_ids:
+            if chunk_id not in known:
+                (self.root / 'pending' / chunk_id).write_text('0')
+                known.add(chunk_id)
+                added += 1
+        return added
+
+    def claim(self, worker_id: str, lease: float) -> Optional[str]:
+        for chunk_id in sorted(os.listdir(self.root / 'pending')):
+            source = self.root / 'pending' / chunk_id
+            expires = time.time() + lease
+            try:
+                # La lease va impostata prima del rename: in claimed/ il file non deve
+                # mai comparire con un mtime passato, o requeue_expired lo riprenderebbe
+                os.utime(source, (expires, expires))
+                os.rename(source, self._claimed_name(chunk_id, worker_id))
+            except FileNotFoundError:   # preso da un altro worker
+                continue
+            return chunk_id
+        return None
+
+    def renew(self, chunk_id: str, worker_id: str, lease: float) -> bool:
+        expires = time.time() + lease
+        try:
+            os.utime(self._claimed_name(chunk_id, worker_id), (expires, expires))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, chunk_id: str, worker_id: str):
+        try:
+            os.rename(self._claimed_name(chunk_id, worker_id), self.root / 'done' / chunk_id)
+        except FileNotFoundError:
+            # Lease scaduta e chunk ripreso da altri: il risultato è comunque scritto, lo si segna fatto
+            for state in ('pending', 'claimed', 'failed'):
+                for name in os.listdir(self.root / state):
+                    if name.split('@')[0] == chunk_id:
+                        try:
+                            os.rename(self.root / state / name, self.root / 'done' / chunk_id)
+                        except FileNotFoundError:
+                            pass
+
+    def fail(self, chunk_id: str, worker_id: str, error: str):
+        source = self._claimed_name(chunk_id, worker_id)
+        attempts = self._attempts(source) + 1
+        state = 'failed' if attempts >= self.max_attempts else 'pending'
+        target = self.root / state / chunk_id
+        try:
+            # Prima il rename: se la lease è scaduta e il chunk è di un altro worker non si crea nulla
+            os.rename(source, target)
+        except FileNotFoundError:
+            return
+        target.write_text(str(attempts))
+        if state == 'failed':
+            (self.root / 'failed' / f"{chunk_id}.error").write_text(error)
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        requeued = 0
+        for name in os.listdir(self.root / 'claimed'):
+            path = self.root / 'claimed' / name
+            try:
+                if path.stat().st_mtime >= now:
+                    continue
+                os.rename(path, self.root / 'pending' / name.split('@')[0])
+                requeued += 1
+            except FileNotFoundError:
+                continue
+        return requeued
+
+    def progress(self) -> Dict[str, int]:
+        counts = {state: len(os.listdir(self.root / state)) for state in QUEUE_STATES}
+        counts['failed'] = sum(1 for name in os.listdir(self.root / 'failed') if not name.endswith('.error'))
+        return counts
+
+
+class SQLiteQueue(WorkQueue):
+    """
+    Coda in un database SQLite: claim con una transazione BEGIN IMMEDIATE.
+    Adatta a più processi sulla stessa macchina (SQLite su cartelle di rete
+    non garantisce il locking).
+    """
+    def __init__(self, path: Union[str, Path], max_attempts: int = 3, timeout: float = 30.0):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, state TEXT NOT NULL, "
+                         "worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_state ON chunks (state, id)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def _transaction(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+            return cursor
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def submit(self, chunk_ids: Iterable[str]) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            conn.executemany("INSERT OR IGNORE INTO chunks (id, state) VALUES (?, 'pending')",
+                             ((chunk_id,) for chunk_id in chunk_ids))
+            after = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            conn.execute("COMMIT")
+            return after - before
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, lease: float) -> Optional[str]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM chunks WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute("UPDATE chunks SET state = 'claimed', worker = ?, lease_until = ? WHERE id = ?",
+                             (worker_id, time.time() + lease, row[0]))
+            conn.execute("COMMIT")
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def renew(self, chunk_id: str, worker_id: str, lease: float) -> bool:
+        conn = self._connect()
+        try:
+            cursor = self._transaction(conn, "UPDATE chunks SET lease_until = ? WHERE id = ? AND worker = ? "
+                                             "AND state = 'claimed'", (time.time() + lease, chunk_id, worker_id))
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def complete(self, chunk_id: str, worker_id: str):
+        conn = self._connect()
+        try:
+            self._transaction(conn, "UPDATE chunks SET state = 'done', worker = ?, error = NULL WHERE id = ?",
+                              (worker_id, chunk_id))
+        finally:
+            conn.close()
+
+    def fail(self, chunk_id: str, worker_id: str, error: str):
+        conn = self._connect()
+        try:
+            self._transaction(conn, "UPDATE chunks SET attempts = attempts + 1, error = ?, "
+                                    "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                                    "WHERE id = ? AND worker = ? AND state = 'claimed'",
+                              (error, self.max_attempts, chunk_id, worker_id))
+        finally:
+            conn.close()
+
+    def requeue_expired(self) -> int:
+        conn = self._connect()
+        try:
+            cursor = self._transaction(conn, "UPDATE chunks SET state = 'pending', worker = NULL "
+                                             "WHERE state = 'claimed' AND lease_until < ?", (time.time(),))
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def progress(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            counts = dict.fromkeys(QUEUE_STATES, 0)
+            counts.update(conn.execute("SELECT state, COUNT(*) FROM chunks GROUP BY state").fetchall())
+            return counts
+        finally:
+            conn.close()
+
+
+QUEUE_TYPES = {'fs': FilesystemQueue, 'sqlite': SQLiteQueue}
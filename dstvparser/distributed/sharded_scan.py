@@ -0,0 +1,317 @@
+"""
+Scansione distribuita di archivi DSTV su più macchine.
+
+Una cartella di job condivisa (es. su NAS) contiene:
+    job.json            configurazione: radice dei file, modalità, tipo di coda
+    manifest/<chunk>    elenco dei file di ogni chunk, relativi alla radice
+    queue/ | queue.db   coda di lavoro (vedi queues.py)
+    results/<chunk>.json  risultati di ogni chunk completato (checkpoint)
+
+Ogni nodo lancia uno o più worker che prendono i chunk dalla coda, li parsano
+con il pool locale e scrivono il risultato; un chunk con il risultato già
+scritto non viene rifatto, quindi un job interrotto riprende da dove era.
+Alla fine i risultati parziali si uniscono in un aggregato o in un catalogo.
+
+Esempio:
+    python -m dstvparser.distributed.sharded_scan init job /mnt/archive --mode scan --chunk-size 500
+    python -m dstvparser.distributed.sharded_scan work job --workers 8      # su ogni nodo
+    python -m dstvparser.distributed.sharded_scan merge job -o scan.json
+"""
+import json
+import os
+import socket
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from dstvparser.distributed.queues import QUEUE_TYPES, WorkQueue
+from dstvparser.models.nc_part import NCPart
+from dstvparser.models.part_catalog import PartCatalog
+from dstvparser.parsers.batch import DSTV_EXTENSIONS, map_parts
+from dstvparser.utils.serialization import OUTPUT_MODES, part_from_dict, part_to_dict
+
+SCAN_MODES = ('scan',) + OUTPUT_MODES
+
+
+def _record(part: Optional[NCPart], mode: str) -> Optional[dict]:
+    """Risultato di un file nel worker; 'scan' tiene solo i campi per l'aggregato"""
+    if part is None:
+        return None
+    if mode == 'scan':
+        return {'code_profile': part.code_profile, 'material': part.material, 'profile_type': part.profile_type,
+                'quantity': part.quantity, 'length': part.length}
+    return part_to_dict(part, mode)
+
+
+def _iter_files(folders: Iterable[Union[str, Path]], recursive: bool) -> Iterator[str]:
+    """Percorre le cartelle in ordine deterministico senza costruire la lista completa"""
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            if not recursive:
+                dirnames.clear()
+            for name in sorted(filenames):
+                if os.path.splitext(name)[1].lower() in DSTV_EXTENSIONS:
+                    yield os.path.join(dirpath, name)
+
+
+def _write_atomic(path: Path, text: str):
+    """Scrive in un file temporaneo e lo rinomina: chi legge non vede mai un file a metà"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+class ShardManifest:
+    """
+    Manifest di un job: configurazione e suddivisione dei file in chunk.
+
+    I percorsi sono salvati relativi alla radice, così ogni nodo può montare
+    l'archivio in un punto diverso (`root` in run_worker).
+    """
+    def __init__(self, job_dir: Union[str, Path], config: Dict[str, Any]):
+        self.job_dir = Path(job_dir)
+        self.config = config
+
+    @classmethod
+    def build(cls, folders: Iterable[Union[str, Path]], job_dir: Union[str, Path], chunk_size: int = 500,
+              recursive: bool = True, mode: str = 'scan', queue: str = 'fs',
+              root: Optional[Union[str, Path]] = None) -> 'ShardManifest':
+        """
+        Crea il job: elenca i file, scrive i chunk del manifest e li mette in coda.
+
+        Ripetere build sulla stessa cartella di job con gli stessi file non
+        duplica il lavoro: i chunk già in coda o completati restano tali.
+        Se i file o i parametri sono cambiati viene sollevato ValueError: i
+        risultati già scritti non corrisponderebbero più ai chunk.
+        """
+        if mode not in SCAN_MODES:
+            raise ValueError(f"Modalità non supportata: {mode}")
+        if queue not in QUEUE_TYPES:
+            raise ValueError(f"Coda non supportata: {queue}")
+        folders = [os.path.abspath(f) for f in folders]
+        root = os.path.abspath(root) if root else os.path.commonpath(folders)
+        job_dir = Path(job_dir)
+        config = {'root': root, 'mode': mode, 'queue': queue, 'recursive': recursive, 'chunk_size': chunk_size}
+        previous = None
+        if (job_dir / 'job.json').exists():
+            previous = cls.load(job_dir).config
+            if any(previous[key] != value for key, value in config.items()):
+                raise ValueError(f"Il job in {job_dir} esiste con parametri diversi: usare una nuova cartella di job")
+        changed = ValueError(f"I file sotto {root} sono cambiati dalla creazione del job: usare una nuova cartella di job")
+        (job_dir / 'manifest').mkdir(parents=True, exist_ok=True)
+        (job_dir / 'results').mkdir(exist_ok=True)
+
+        chunk_ids, chunk, files = [], [], 0
+
+        def flush():
+            chunk_id = f"{len(chunk_ids):06d}"
+            text = '\n'.join(chunk) + '\n'
+            if previous is None:
+                _write_atomic(job_dir / 'manifest' / chunk_id, text)
+            elif len(chunk_ids) >= previous['chunks'] or \
+                    (job_dir / 'manifest' / chunk_id).read_text(encoding='utf-8') != text:
+                raise changed
+            chunk_ids.append(chunk_id)
+            chunk.clear()
+
+        for path in _iter_files(folders, recursive):
+            chunk.append(os.path.relpath(path, root).replace(os.sep, '/'))
+            files += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        if previous is not None and len(chunk_ids) != previous['chunks']:
+            raise changed
+
+        config.update(chunks=len(chunk_ids), files=files)
+        _write_atomic(job_dir / 'job.json', json.dumps(config, indent=2))
+        manifest = cls(job_dir, config)
+        manifest.queue().submit(chunk_ids)
+        return manifest
+
+    @classmethod
+    def load(cls, job_dir: Union[str, Path]) -> 'ShardManifest':
+        job_dir = Path(job_dir)
+        return cls(job_dir, json.loads((job_dir / 'job.json').read_text(encoding='utf-8')))
+
+    @property
+    def mode(self) -> str:
+        return self.config['mode']
+
+    @property
+    def results_dir(self) -> Path:
+        return self.job_dir / 'results'
+
+    def queue(self) -> WorkQueue:
+        queue_type = self.config['queue']
+        target = self.job_dir / ('queue' if queue_type == 'fs' else 'queue.db')
+        return QUEUE_TYPES[queue_type](target)
+
+    def chunk_ids(self) -> List[str]:
+        return [f"{i:06d}" for i in range(self.config['chunks'])]
+
+    def chunk_paths(self, chunk_id: str) -> List[str]:
+        """Percorsi relativi dei file di un chunk"""
+        text = (self.job_dir / 'manifest' / chunk_id).read_text(encoding='utf-8')
+        return [line for line in text.splitlines() if line]
+
+    def result_path(self, chunk_id: str) -> Path:
+        return self.results_dir / f"{chunk_id}.json"
+
+
+def _process_chunk(manifest: ShardManifest, queue: WorkQueue, chunk_id: str, worker_id: str, root: str,
+                   lease: float, max_workers: Optional[int]):
+    relative = manifest.chunk_paths(chunk_id)
+    paths = [os.path.join(root, p) for p in relative]
+    results: Dict[str, Any] = {}
+    renew_at = time.monotonic() + lease / 3
+    func = partial(_record, mode=manifest.mode)
+    for rel, (_, record) in zip(relative, map_parts(func, paths, max_workers=max_workers)):
+        results[rel] = record
+        if time.monotonic() >= renew_at:
+            queue.renew(chunk_id, worker_id, lease)
+            renew_at = time.monotonic() + lease / 3
+    payload = {'chunk': chunk_id, 'worker': worker_id, 'mode': manifest.mode, 'results': results}
+    _write_atomic(manifest.result_path(chunk_id), json.dumps(payload, ensure_ascii=False))
+
+
+def run_worker(job_dir: Union[str, Path], worker_id: Optional[str] = None, lease: float = 600.0,
+               max_workers: Optional[int] = None, root: Optional[Union[str, Path]] = None,
+               max_chunks: Optional[int] = None) -> int:
+    """
+    Prende chunk dalla coda finché ce ne sono e ne scrive i risultati.
+
+    Args:
+        job_dir: cartella del job (condivisa tra i nodi)
+        worker_id: nome del worker; default host-pid
+        lease: secondi dopo i quali un chunk non completato torna in coda
+               (rinnovata durante l'elaborazione)
+        max_workers: processi del pool locale per chunk
+        root: radice dei file su questo nodo, se diversa da quella del manifest
+        max_chunks: si ferma dopo questo numero di chunk
+    Returns:
+        int: chunk elaborati
+    """
+    manifest = ShardManifest.load(job_dir)
+    queue = manifest.queue()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    worker_id = worker_id.replace('@', '_').replace('/', '_').replace(os.sep, '_')
+    root = str(root or manifest.config['root'])
+    processed = 0
+    while max_chunks is None or processed < max_chunks:
+        queue.requeue_expired()
+        chunk_id = queue.claim(worker_id, lease)
+        if chunk_id is None:
+            break
+        try:
+            # Risultato già scritto da un worker fermatosi prima di segnarlo completato
+            if not manifest.result_path(chunk_id).exists():
+                _process_chunk(manifest, queue, chunk_id, worker_id, root, lease, max_workers)
+        except Exception as e:
+            queue.fail(chunk_id, worker_id, f"{type(e).__name__}: {e}")
+            continue
+        queue.complete(chunk_id, worker_id)
+        processed += 1
+    return processed
+
+
+def job_status(job_dir: Union[str, Path]) -> Dict[str, Any]:
+    """Avanzamento del job: chunk per stato e file totali"""
+    manifest = ShardManifest.load(job_dir)
+    status = manifest.queue().progress()
+    status['chunks'] = manifest.config['chunks']
+    status['files'] = manifest.config['files']
+    return status
+
+
+def iter_results(job_dir: Union[str, Path]) -> Iterator[Tuple[str, Optional[dict]]]:
+    """(percorso relativo, risultato) di tutti i chunk completati; None per i file non parsabili"""
+    manifest = ShardManifest.load(job_dir)
+    for chunk_id in manifest.chunk_ids():
+        path = manifest.result_path(chunk_id)
+        if path.exists():
+            yield from json.loads(path.read_text(encoding='utf-8'))['results'].items()
+
+
+def merge_aggregate(job_dir: Union[str, Path]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Unisce i risultati per sezione e materiale: numero di file, pezzi e lunghezza totale.
+
+    Returns:
+        Tuple[List[dict], List[str]]: gruppi ordinati e file non parsabili
+    """
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    failed = []
+    for path, record in iter_results(job_dir):
+        if record is None:
+            failed.append(path)
+            continue
+        key = (record['code_profile'], record['material'])
+        group = groups.setdefault(key, {'code_profile': key[0], 'material': key[1],
+                                        'profile_type': record['profile_type'],
+                                        'files': 0, 'pieces': 0, 'total_length': 0.0})
+        length = record['length'] if 'length' in record else record['lenght']
+        group['files'] += 1
+        group['pieces'] += record['quantity']
+        group['total_length'] += length * record['quantity']
+    return sorted(groups.values(), key=lambda g: (g['code_profile'], g['material'])), failed
+
+
+def merge_catalog(job_dir: Union[str, Path]) -> PartCatalog:
+    """Ricostruisce le parti di un job in modalità 'full' e le indicizza in un PartCatalog"""
+    if ShardManifest.load(job_dir).mode != 'full':
+        raise ValueError("merge_catalog richiede un job creato con mode='full'")
+    return PartCatalog.from_results({path: part_from_dict(record) if record is not None else None
+                                     for path, record in iter_results(job_dir)})
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scansione distribuita di archivi DSTV")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_init = sub.add_parser('init', help="crea il manifest e mette in coda i chunk")
+    p_init.add_argument('job_dir')
+    p_init.add_argument('folders', nargs='+')
+    p_init.add_argument('--chunk-size', type=int, default=500)
+    p_init.add_argument('--mode', choices=SCAN_MODES, default='scan')
+    p_init.add_argument('--queue', choices=sorted(QUEUE_TYPES), default='fs')
+    p_init.add_argument('--root', default=None)
+    p_init.add_argument('--no-recursive', action='store_true')
+
+    p_work = sub.add_parser('work', help="elabora chunk finché la coda non è vuota")
+    p_work.add_argument('job_dir')
+    p_work.add_argument('--workers', type=int, default=None)
+    p_work.add_argument('--lease', type=float, default=600.0)
+    p_work.add_argument('--root', default=None)
+    p_work.add_argument('--worker-id', default=None)
+    p_work.add_argument('--max-chunks', type=int, default=None)
+
+    p_status = sub.add_parser('status', help="avanzamento del job")
+    p_status.add_argument('job_dir')
+
+    p_merge = sub.add_parser('merge', help="unisce i risultati in un aggregato per sezione e materiale")
+    p_merge.add_argument('job_dir')
+    p_merge.add_argument('-o', '--output', default=None)
+
+    args = parser.parse_args()
+    if args.command == 'init':
+        manifest = ShardManifest.build(args.folders, args.job_dir, args.chunk_size, not args.no_recursive,
+                                       args.mode, args.queue, args.root)
+        print(f"{manifest.config['files']} file in {manifest.config['chunks']} chunk")
+    elif args.command == 'work':
+        done = run_worker(args.job_dir, args.worker_id, args.lease, args.workers, args.root, args.max_chunks)
+        print(f"{done} chunk elaborati")
+    elif args.command == 'status':
+        print(json.dumps(job_status(args.job_dir), indent=2))
+    else:
+        groups, failed = merge_aggregate(args.job_dir)
+        text = json.dumps({'groups': groups, 'failed': failed}, indent=2, ensure_ascii=False)
+        if args.output:
+            Path(args.output).write_text(text + '\n', encoding='utf-8')
+        else:
+            print(text)
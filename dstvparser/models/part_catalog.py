@@ -0,0 +1,160 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from dstvparser.models.nc_part import NCPart
+
+HEADER_FIELDS = ('order_id', 'piece_id', 'material', 'profile_type', 'code_profile')
+FEATURE_FLAGS = ('has_holes', 'has_slots', 'has_notches', 'has_worked_areas', 'flange_skew_cut', 'web_skew_cut')
+FEATURE_FIELDS = ('hole_diameter', 'slot_diameter', 'hole_face', 'slot_face', 'hole_on', 'slot_on')
+QUERY_FIELDS = HEADER_FIELDS + FEATURE_FLAGS + FEATURE_FIELDS
+
+
+def _diameter(value: float) -> float:
+    """Normalizza i diametri per l'uso come chiave (evita 22.0 vs 22.000001)"""
+    return round(float(value), 3)
+
+
+class PartCatalog:
+    """
+    Catalogo in memoria delle parti di una commessa con indici invertiti.
+
+    Per ogni campo dell'header, per i diametri di fori/asole (anche per faccia)
+    e per le lavorazioni booleane viene mantenuto l'insieme delle chiavi delle
+    parti; una query composta è l'intersezione degli insiemi, a partire dal
+    più piccolo, senza riscandire le parti.
+
+    Esempio:
+        catalog.query(code_profile='HEA 200', material='S355', hole_on=('o', 22), flange_skew_cut=True)
+    """
+    def __init__(self):
+        self._parts: Dict[str, NCPart] = {}
+        self._index: Dict[str, Dict[Any, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._entries: Dict[str, List[Tuple[str, Any]]] = {}   # chiave -> voci di indice, per la rimozione
+        self._lengths: List[Tuple[float, str]] = []            # ordinata, per le query su intervalli
+
+    @classmethod
+    def from_results(cls, results: Mapping[str, Optional[NCPart]]) -> 'PartCatalog':
+        """Crea il catalogo da {percorso: parte} (es. parse_files); le parti None sono ignorate"""
+        catalog = cls()
+        for key, part in results.items():
+            if part is not None:
+                catalog.add(key, part)
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._parts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parts)
+
+    def get(self, key: str) -> Optional[NCPart]:
+        return self._parts.get(key)
+
+    @staticmethod
+    def _index_entries(part: NCPart) -> List[Tuple[str, Any]]:
+        entries = []
+        for name in HEADER_FIELDS:
+            value = getattr(part, name)
+            entries.append((name, value.strip() if isinstance(value, str) else value))
+        for name in FEATURE_FLAGS:
+            entries.append((name, bool(getattr(part, name)())))
+        for hole in part.holes:
+            entries.append(('hole_diameter', _diameter(hole.diameter)))
+            entries.append(('hole_on', (hole.face, _diameter(hole.diameter))))
+            entries.append(('hole_face', hole.face))
+        for slot in part.slots:
+            entries.append(('slot_diameter', _diameter(slot.diameter)))
+            entries.append(('slot_on', (slot.face, _diameter(slot.diameter))))
+            entries.append(('slot_face', slot.face))
+        return list(dict.fromkeys(entries))
+
+    def add(self, key: str, part: NCPart):
+        """Aggiunge (o sostituisce) una parte"""
+        if key in self._parts:
+            self.remove(key)
+        entries = self._index_entries(part)
+        for name, value in entries:
+            self._index[name][value].add(key)
+        self._parts[key] = part
+        self._entries[key] = entries
+        insort(self._lengths, (float(part.length), key))
+
+    def remove(self, key: str) -> Optional[NCPart]:
+        """Rimuove una parte aggiornando gli indici; restituisce la parte rimossa"""
+        part = self._parts.pop(key, None)
+        if part is None:
+            return None
+        for name, value in self._entries.pop(key):
+            keys = self._index[name][value]
+            keys.discard(key)
+            if not keys:
+                del self._index[name][value]
+        pos = bisect_left(self._lengths, (float(part.length), key))
+        if pos < len(self._lengths) and self._lengths[pos][1] == key:
+            del self._lengths[pos]
+        return part
+
+    def _lookup(self, name: str, value: Any) -> Set[str]:
+        """Chiavi per un criterio; una lista/tupla di valori (non per *_on) vale come OR"""
+        index = self._index.get(name, {})
+        if name in ('hole_on', 'slot_on'):
+            face, diameter = value
+            return index.get((face, _diameter(diameter)), set())
+        if name in ('hole_diameter', 'slot_diameter'):
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            return set().union(*(index.get(_diameter(v), set()) for v in values))
+        if isinstance(value, (list, tuple, set)):
+            return set().union(*(index.get(v, set()) for v in value))
+        return index.get(value.strip() if isinstance(value, str) else value, set())
+
+    def _length_range(self, min_length: Optional[float], max_length: Optional[float]) -> Set[str]:
+        lo = 0 if min_length is None else bisect_left(self._lengths, (float(min_length), ''))
+        hi = len(self._lengths) if max_length is None else bisect_right(self._lengths, (float(max_length), '\U0010ffff'))
+        return {key for _, key in self._lengths[lo:hi]}
+
+    def query_keys(self, min_length: Optional[float] = None, max_length: Optional[float] = None,
+                   **criteria: Any) -> List[str]:
+        """
+        Chiavi delle parti che soddisfano tutti i criteri.
+
+        Criteri supportati:
+            campi header: order_id, piece_id, material, profile_type, code_profile
+            lavorazioni: has_holes, has_slots, has_notches, has_worked_areas, flange_skew_cut, web_skew_cut
+            fori/asole: hole_diameter, slot_diameter, hole_face, slot_face, hole_on=(faccia, diametro), slot_on=(...)
+            lunghezza: min_length, max_length
+        """
+        sets = []
+        for name, value in criteria.items():
+            if name not in QUERY_FIELDS:
+                raise ValueError(f"Criterio non supportato: {name}")
+            sets.append(self._lookup(name, value))
+        if min_length is not None or max_length is not None:
+            sets.append(self._length_range(min_length, max_length))
+        if not sets:
+            return sorted(self._parts)
+
+        sets.sort(key=len)
+        result = set(sets[0])
+        for keys in sets[1:]:
+            if not result:
+                break
+            result &= keys
+        return sorted(result)
+
+    def query(self, **criteria: Any) -> List[NCPart]:
+        """Come query_keys, ma restituisce le parti"""
+        return [self._parts[key] for key in self.query_keys(**criteria)]
+
+    def count(self, **criteria: Any) -> int:
+        return len(self.query_keys(**criteria))
+
+    def facet(self, name: str) -> Dict[Any, int]:
+        """Numero di parti per ogni valore di un campo indicizzato (es. facet('material'))"""
+        return {value: len(keys) for value, keys in self._index.get(name, {}).items()}
+
+    def items(self) -> Iterable[Tuple[str, NCPart]]:
+        return self._parts.items()
@@ -0,0 +1,304 @@
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dstvparser.models.nc_part import NCPart
+
+EPS = 1e-6
+
+
+@dataclass
+class CuttingPattern:
+    """Schema di taglio di una barra commerciale, ripetuto `count` volte"""
+    stock_length: float
+    cuts: List[Tuple[str, float, int]]  # (piece_id, lunghezza, numero pezzi)
+    used_length: float                  # pezzi + lame + sfridi di testa/coda
+    waste: float
+    count: int = 1
+
+
+@dataclass
+class BarNestingResult:
+    """Risultato del nesting per una coppia sezione/materiale"""
+    code_profile: str
+    material: str
+    patterns: List[CuttingPattern] = field(default_factory=list)
+    unplaced: List[Tuple[str, float, int]] = field(default_factory=list)  # pezzi più lunghi della barra o senza lunghezza
+
+    def bars_count(self) -> int:
+        """Numero totale di barre da tagliare"""
+        return sum(p.count for p in self.patterns)
+
+    def total_stock_length(self) -> float:
+        """Lunghezza totale di barre commerciali impiegate"""
+        return sum(p.stock_length * p.count for p in self.patterns)
+
+    def total_waste(self) -> float:
+        return sum(p.waste * p.count for p in self.patterns)
+
+    def utilization(self) -> float:
+        """Rapporto tra lunghezza dei pezzi e lunghezza delle barre (0..1)"""
+        stock = self.total_stock_length()
+        if stock <= 0:
+            return 0.0
+        pieces = sum(length * n * p.count for p in self.patterns for _, length, n in p.cuts)
+        return pieces / stock
+
+
+class _Bar:
+    """Barra in lavorazione: i pezzi uguali sono tenuti come contatori, non come oggetti"""
+    __slots__ = ('stock', 'usable', 'remaining', 'load', 'pieces', 'counts')
+
+    def __init__(self, stock: float, usable: float):
+        self.stock = stock
+        self.usable = usable
+        self.remaining = usable   # spazio per il prossimo pezzo, lama già considerata
+        self.load = 0.0           # pezzi + lame tra i pezzi
+        self.pieces = 0
+        self.counts: Dict[int, int] = {}
+
+    def fit_count(self, length: float, kerf: float) -> int:
+        return int((self.remaining + kerf + EPS) // (length + kerf))
+
+    def add(self, idx: int, length: float, n: int, kerf: float):
+        self.counts[idx] = self.counts.get(idx, 0) + n
+        self.load += n * length + (n if self.pieces else n - 1) * kerf
+        self.pieces += n
+        self.remaining -= n * (length + kerf)
+
+
+class _FirstFitTree:
+    """Albero di segmenti sul residuo delle barre: trova la prima barra che contiene un pezzo in O(log n)"""
+    def __init__(self, capacity: int = 64):
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.tree = [-math.inf] * (2 * self.size)
+        self.count = 0
+
+    def append(self, value: float):
+        if self.count == self.size:
+            self._grow()
+        self.update(self.count, value)
+        self.count += 1
+
+    def _grow(self):
+        leaves = self.tree[self.size:self.size + self.count]
+        self.size *= 2
+        self.tree = [-math.inf] * (2 * self.size)
+        self.tree[self.size:self.size + len(leaves)] = leaves
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def update(self, pos: int, value: float):
+        tree = self.tree
+        i = pos + self.size
+        tree[i] = value
+        i //= 2
+        while i:
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+            i //= 2
+
+    def first_fit(self, need: float) -> int:
+        """Indice della prima barra con residuo >= need, -1 se nessuna"""
+        tree = self.tree
+        if tree[1] < need:
+            return -1
+        i = 1
+        while i < self.size:
+            i = 2 * i if tree[2 * i] >= need else 2 * i + 1
+        return i - self.size
+
+
+class BarNester:
+    """
+    Nesting monodimensionale dei pezzi su barre commerciali.
+
+    I pezzi sono raggruppati per (code_profile, material) e disposti con
+    first-fit-decreasing; opzionalmente una ricerca locale a tempo prova a
+    svuotare le barre meno sfruttate ridistribuendone i pezzi.
+    """
+    def __init__(self, stock_lengths: Sequence[float] = (6000.0, 12000.0), kerf: float = 3.0,
+                 trim_start: float = 0.0, trim_end: float = 0.0, seed: Optional[int] = 0):
+        if not stock_lengths:
+            raise ValueError("Serve almeno una lunghezza di barra commerciale")
+        self.stock_lengths = sorted(float(s) for s in stock_lengths)
+        if kerf < 0:
+            raise ValueError(f"Spessore lama negativo: {kerf}")
+        self.kerf = float(kerf)
+        self.trim = float(trim_start) + float(trim_end)
+        if self.stock_lengths[-1] - self.trim <= 0:
+            raise ValueError("Sfridi di testa/coda più lunghi della barra")
+        self.seed = seed
+
+    def nest(self, parts: Iterable[NCPart], time_limit: float = 0.0) -> List[BarNestingResult]:
+        """
+        Esegue il nesting di tutte le parti.
+
+        Args:
+            parts: parti già parsate (le None vengono ignorate)
+            time_limit: secondi complessivi per la ricerca migliorativa (0 = solo FFD)
+        Returns:
+            List[BarNestingResult]: un risultato per ogni coppia sezione/materiale
+        """
+        groups: Dict[Tuple[str, str], List[Tuple[str, float, int]]] = defaultdict(list)
+        for part in parts:
+            if part is None or not part.quantity or part.quantity <= 0:
+                continue
+            groups[(part.code_profile, part.material)].append((part.piece_id, float(part.length), int(part.quantity)))
+
+        total_pieces = sum(qty for demands in groups.values() for _, _, qty in demands) or 1
+        deadline_start = time.perf_counter()
+        rng = random.Random(self.seed)
+        results = []
+        for (code_profile, material), demands in groups.items():
+            bars, unplaced = self._first_fit_decreasing(demands)
+            if time_limit > 0 and len(bars) > 1:
+                # Il tempo è ripartito in proporzione al numero di pezzi del gruppo
+                share = time_limit * sum(qty for _, _, qty in demands) / total_pieces
+                deadline = min(time.perf_counter() + share, deadline_start + time_limit)
+                bars = self._improve(bars, demands, deadline, rng)
+            for bar in bars:
+                self._downsize(bar)
+            results.append(BarNestingResult(
+                code_profile=code_profile,
+                material=material,
+                patterns=self._collapse(bars, demands),
+                unplaced=[(demands[idx][0], demands[idx][1], qty) for idx, qty in unplaced],
+            ))
+        return results
+
+    def _new_bar(self) -> _Bar:
+        stock = self.stock_lengths[-1]
+        return _Bar(stock, stock - self.trim)
+
+    def _first_fit_decreasing(self, demands: List[Tuple[str, float, int]]) -> Tuple[List[_Bar], List[Tuple[int, int]]]:
+        """FFD sulle quantità: pezzi uguali vengono inseriti a blocchi nella stessa barra"""
+        max_usable = self.stock_lengths[-1] - self.trim
+        kerf = self.kerf
+        bars: List[_Bar] = []
+        tree = _FirstFitTree()
+        unplaced = []
+        for idx in sorted(range(len(demands)), key=lambda i: -demands[i][1]):
+            _, length, qty = demands[idx]
+            # Una lunghezza nulla o negativa non si taglia (e con kerf 0 darebbe infiniti pezzi per barra)
+            if length <= 0 or length > max_usable + EPS:
+                unplaced.append((idx, qty))
+                continue
+            while qty > 0:
+                pos = tree.first_fit(length - EPS)
+                if pos < 0:
+                    bars.append(self._new_bar())
+                    pos = len(bars) - 1
+                    tree.append(bars[pos].remaining)
+                bar = bars[pos]
+                n = min(qty, bar.fit_count(length, kerf))
+                bar.add(idx, length, n, kerf)
+                tree.update(pos, bar.remaining)
+                qty -= n
+        return bars, unplaced
+
+    def _stock_for(self, load: float) -> float:
+        """Barra commerciale più corta che contiene il carico"""
+        for stock in self.stock_lengths:
+            if stock - self.trim + EPS >= load:
+                return stock
+        return self.stock_lengths[-1]
+
+    def _downsize(self, bar: _Bar):
+        stock = self._stock_for(bar.load)
+        bar.remaining += (stock - self.trim) - bar.usable
+        bar.stock, bar.usable = stock, stock - self.trim
+
+    def _improve(self, bars: List[_Bar], demands: List[Tuple[str, float, int]], deadline: float,
+                 rng: random.Random) -> List[_Bar]:
+        """
+        Ricerca locale ruin & recreate: svuota alcune barre poco sfruttate e
+        ridistribuisce i pezzi (best-fit) sulle altre; accetta se il costo non peggiora.
+        """
+        kerf = self.kerf
+        while time.perf_counter() < deadline and len(bars) > 1:
+            bars.sort(key=lambda b: b.load / b.usable)
+            pool = max(2, len(bars) // 2)
+            removed_pos = set(rng.sample(range(pool), min(pool, rng.randint(1, 3))))
+            removed = [bars[i] for i in removed_pos]
+            others = [b for i, b in enumerate(bars) if i not in removed_pos]
+
+            freed: Dict[int, int] = defaultdict(int)
+            for bar in removed:
+                for idx, n in bar.counts.items():
+                    freed[idx] += n
+
+            # Best-fit sulle barre rimaste, lavorando su copie per poter annullare
+            touched: Dict[int, _Bar] = {}
+            leftovers = []
+            for idx in sorted(freed, key=lambda i: -demands[i][1]):
+                length, qty = demands[idx][1], freed[idx]
+                while qty > 0:
+                    best, best_rem = -1, math.inf
+                    for j, other in enumerate(others):
+                        cand = touched.get(j, other)
+                        if length <= cand.remaining + EPS and cand.remaining < best_rem:
+                            best, best_rem = j, cand.remaining
+                    if best < 0:
+                        break
+                    if best not in touched:
+                        touched[best] = self._copy_bar(others[best])
+                    cand = touched[best]
+                    n = min(qty, cand.fit_count(length, kerf))
+                    cand.add(idx, length, n, kerf)
+                    qty -= n
+                if qty > 0:
+                    leftovers.append((idx, qty))
+
+            new_bars: List[_Bar] = []
+            for idx, qty in leftovers:
+                length = demands[idx][1]
+                while qty > 0:
+                    target = next((b for b in new_bars if length <= b.remaining + EPS), None)
+                    if target is None:
+                        target = self._new_bar()
+                        new_bars.append(target)
+                    n = min(qty, target.fit_count(length, kerf))
+                    target.add(idx, length, n, kerf)
+                    qty -= n
+
+            # Costo = barre commerciali più corte che contengono ciascun carico
+            old_cost = (sum(self._stock_for(b.load) for b in removed)
+                        + sum(self._stock_for(others[j].load) for j in touched), len(removed))
+            new_cost = (sum(self._stock_for(b.load) for b in new_bars)
+                        + sum(self._stock_for(b.load) for b in touched.values()), len(new_bars))
+            if new_cost <= old_cost:
+                for j, bar in touched.items():
+                    others[j] = bar
+                bars = others + new_bars
+        return bars
+
+    @staticmethod
+    def _copy_bar(bar: _Bar) -> _Bar:
+        copy = _Bar(bar.stock, bar.usable)
+        copy.remaining, copy.load, copy.pieces = bar.remaining, bar.load, bar.pieces
+        copy.counts = dict(bar.counts)
+        return copy
+
+    def _collapse(self, bars: List[_Bar], demands: List[Tuple[str, float, int]]) -> List[CuttingPattern]:
+        """Raggruppa le barre con lo stesso schema di taglio"""
+        patterns: Dict[tuple, CuttingPattern] = {}
+        for bar in bars:
+            key = (bar.stock, tuple(sorted(bar.counts.items())))
+            pattern = patterns.get(key)
+            if pattern is not None:
+                pattern.count += 1
+                continue
+            used = bar.load + self.trim
+            patterns[key] = CuttingPattern(
+                stock_length=bar.stock,
+                cuts=[(demands[idx][0], demands[idx][1], n)
+                      for idx, n in sorted(bar.counts.items(), key=lambda c: -demands[c[0]][1])],
+                used_length=used,
+                waste=bar.stock - used,
+            )
+        return sorted(patterns.values(), key=lambda p: (-p.stock_length, p.waste))
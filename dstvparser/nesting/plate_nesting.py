@@ -0,0 +1,449 @@
+import math
+import os
+import random
+import time
+from bisect import insort
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.utils.geometry import split_contour_loops
+
+NESTING_MODES = ('bbox', 'contour')
+
+Polygon = List[Tuple[float, float]]
+
+
+@dataclass
+class PlacedPlate:
+    """
+    Posizione di una lamiera sul foglio: il pezzo va ruotato di `rotation`
+    gradi attorno all'origine DSTV e poi traslato di (dx, dy).
+    """
+    piece_id: str
+    rotation: float
+    dx: float
+    dy: float
+
+    def transform(self, x: float, y: float) -> Tuple[float, float]:
+        """Coordinate sul foglio di un punto del pezzo (es. un foro)"""
+        a = math.radians(self.rotation)
+        return (x * math.cos(a) - y * math.sin(a) + self.dx, x * math.sin(a) + y * math.cos(a) + self.dy)
+
+
+@dataclass
+class SheetLayout:
+    """Un foglio di lamiera con i pezzi disposti, ripetuto `count` volte"""
+    length: float
+    width: float
+    placements: List[PlacedPlate] = field(default_factory=list)
+    used_area: float = 0.0     # area netta dei pezzi (contorno esterno meno i fori IK)
+    count: int = 1
+
+    def utilization(self) -> float:
+        return self.used_area / (self.length * self.width) if self.length and self.width else 0.0
+
+
+@dataclass
+class PlateNestingResult:
+    """Risultato del nesting per una coppia materiale/spessore"""
+    material: str
+    thickness: float
+    sheets: List[SheetLayout] = field(default_factory=list)
+    unplaced: List[Tuple[str, int]] = field(default_factory=list)   # (piece_id, quantità) più grandi del foglio
+
+    def sheets_count(self) -> int:
+        return sum(s.count for s in self.sheets)
+
+    def total_sheet_area(self) -> float:
+        return sum(s.length * s.width * s.count for s in self.sheets)
+
+    def utilization(self) -> float:
+        """Area dei pezzi su area dei fogli impiegati (0..1)"""
+        total = self.total_sheet_area()
+        return sum(s.used_area * s.count for s in self.sheets) / total if total else 0.0
+
+
+def _polygon_area(polygon: Polygon) -> float:
+    return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]))) / 2
+
+
+def plate_outline(part: NCPart, mode: str = 'contour') -> Tuple[Polygon, float]:
+    """
+    Sagoma di ingombro di una lamiera e sua area netta.
+
+    In modalità 'contour' è l'anello esterno (il più grande) del contorno AK
+    della faccia 'v'; in modalità 'bbox', o se il contorno manca, il
+    rettangolo che lo contiene (o length x width dall'header).
+    """
+    loops = split_contour_loops(part.v_contour)
+    if loops:
+        loops.sort(key=_polygon_area, reverse=True)
+        outer = loops[0][:-1] if loops[0][0] == loops[0][-1] else loops[0]
+        area = _polygon_area(outer) - sum(_polygon_area(loop) for loop in loops[1:])
+        if mode == 'contour':
+            return outer, area
+        xs, ys = [x for x, _ in outer], [y for _, y in outer]
+        return [(min(xs), min(ys)), (max(xs), min(ys)), (max(xs), max(ys)), (min(xs), max(ys))], area
+    length, width = float(part.length), float(part.dimensions.get('width', 0.0))
+    return [(0.0, 0.0), (length, 0.0), (length, width), (0.0, width)], length * width
+
+
+def _rotate(polygon: Polygon, angle: float) -> Polygon:
+    a = math.radians(angle)
+    cos_a, sin_a = math.cos(a), math.sin(a)
+    return [(x * cos_a - y * sin_a, x * sin_a + y * cos_a) for x, y in polygon]
+
+
+class _Raster:
+    """Sagoma rasterizzata: una bitmask (int) per riga di celle, bit i = colonna i occupata"""
+    __slots__ = ('rows', 'width', 'height', 'origin')
+
+    def __init__(self, rows: List[int], width: int, origin: Tuple[float, float]):
+        self.rows = rows
+        self.width = width
+        self.height = len(rows)
+        self.origin = origin   # minimo (x, y) della sagoma ruotata, in mm, rispetto alla cella (0, 0) + pad
+
+
+def _cell_span(x0: float, x1: float, resolution: float) -> int:
+    c0 = max(0, int(math.floor(x0 / resolution)))
+    c1 = max(c0, int(math.ceil(x1 / resolution)) - 1)
+    return ((1 << (c1 - c0 + 1)) - 1) << c0
+
+
+def _rasterize(polygon: Polygon, resolution: float, pad: int) -> _Raster:
+    """
+    Rasterizzazione conservativa: ogni cella toccata dal bordo o interna al
+    poligono è occupata; la sagoma è poi dilatata di `pad` celle per lato
+    (distanza minima tra i pezzi).
+    """
+    min_x, min_y = min(x for x, _ in polygon), min(y for _, y in polygon)
+    points = [(x - min_x, y - min_y) for x, y in polygon]
+    edges = list(zip(points, points[1:] + points[:1]))
+    n_rows = max(1, int(math.ceil(max(y for _, y in points) / resolution - 1e-9)))
+    width = max(1, int(math.ceil(max(x for x, _ in points) / resolution - 1e-9)))
+    rows = [0] * n_rows
+    for j in range(n_rows):
+        y0, y1 = j * resolution, (j + 1) * resolution
+        mask = 0
+        for (ax, ay), (bx, by) in edges:
+            lo, hi = max(min(ay, by), y0), min(max(ay, by), y1)
+            if lo > hi:
+                continue
+            if ay == by:
+                xs = (ax, bx)
+            else:
+                xs = tuple(ax + (bx - ax) * (y - ay) / (by - ay) for y in (lo, hi))
+            mask |= _cell_span(min(xs), max(xs), resolution)
+        # Interno: regola pari/dispari sulla mezzeria della riga
+        ym = (y0 + y1) / 2
+        crossings = sorted(ax + (bx - ax) * (ym - ay) / (by - ay)
+                           for (ax, ay), (bx, by) in edges if (ay <= ym) != (by <= ym))
+        for xa, xb in zip(crossings[::2], crossings[1::2]):
+            mask |= _cell_span(xa, xb, resolution)
+        rows[j] = mask & ((1 << width) - 1)
+
+    if pad:
+        grown = []
+        for mask in rows:
+            wide = 0
+            for d in range(2 * pad + 1):
+                wide |= mask << d
+            grown.append(wide)
+        rows = [0] * (n_rows + 2 * pad)
+        for j, mask in enumerate(grown):
+            for d in range(2 * pad + 1):
+                rows[j + d] |= mask
+        width += 2 * pad
+    return _Raster(rows, width, (min_x - pad * resolution, min_y - pad * resolution))
+
+
+class _Sheet:
+    """Foglio in lavorazione: occupazione per righe (bitmask) e punti candidati ordinati per (x, y)"""
+    __slots__ = ('size', 'cols', 'rows', 'grid', 'candidates', 'free', 'placed', 'extent', 'failed')
+
+    def __init__(self, size: Tuple[float, float], cols: int, rows: int):
+        self.size = size          # formato del foglio in mm
+        self.cols = cols
+        self.rows = rows
+        self.grid = [0] * rows
+        self.candidates: List[Tuple[int, int]] = [(0, 0)]
+        self.free = cols * rows
+        self.placed: List[Tuple[int, float, int, int]] = []   # (pezzo, rotazione, colonna, riga)
+        self.extent = (0, 0)                                   # colonne e righe usate
+        self.failed = set()   # pezzi che non sono entrati: il foglio si riempie soltanto, quindi non entreranno più
+
+    def fits(self, raster: _Raster, x: int, y: int) -> bool:
+        if x < 0 or y < 0 or x + raster.width > self.cols or y + raster.height > self.rows:
+            return False
+        grid = self.grid
+        for k, mask in enumerate(raster.rows):
+            if grid[y + k] & (mask << x):
+                return False
+        return True
+
+    def slide(self, raster: _Raster, x: int, y: int) -> Tuple[int, int]:
+        """Sposta il pezzo in basso e a sinistra finché non tocca qualcosa"""
+        moved = True
+        while moved:
+            moved = False
+            while self.fits(raster, x - 1, y):
+                x -= 1
+                moved = True
+            while self.fits(raster, x, y - 1):
+                y -= 1
+                moved = True
+        return x, y
+
+    def find(self, raster: _Raster) -> Optional[Tuple[int, int]]:
+        """Primo candidato (più a sinistra, poi più in basso) in cui il pezzo entra"""
+        stale = []
+        best = None
+        for i, (x, y) in enumerate(self.candidates):
+            if best is not None and x >= best[0]:
+                break
+            if self.grid[y] >> x & 1:
+                stale.append(i)
+                continue
+            if self.fits(raster, x, y):
+                pos = self.slide(raster, x, y)
+                if best is None or pos < best:
+                    best = pos
+        for i in reversed(stale):
+            del self.candidates[i]
+        return best
+
+    def place(self, raster: _Raster, x: int, y: int, item: int, rotation: float, area_cells: int):
+        for k, mask in enumerate(raster.rows):
+            self.grid[y + k] |= mask << x
+        self.free -= area_cells
+        self.placed.append((item, rotation, x, y))
+        self.extent = (max(self.extent[0], x + raster.width), max(self.extent[1], y + raster.height))
+        for candidate in ((x + raster.width, y), (x, y + raster.height), (x + raster.width, 0), (0, y + raster.height)):
+            if candidate[0] < self.cols and candidate[1] < self.rows:
+                insort(self.candidates, candidate)
+
+
+def _nest_group(shapes: List[Tuple[str, int, Polygon, float]], sheet_sizes: List[Tuple[float, float]],
+                spacing: float, margin: float, rotations: List[float], resolution: float,
+                seed: int, time_limit: float) -> Tuple[tuple, List[SheetLayout], List[Tuple[str, int]]]:
+    """
+    Nesting di un gruppo materiale/spessore. Il primo passaggio dispone i pezzi
+    per area decrescente; finché c'è tempo, ripete con ordini perturbati e
+    tiene la soluzione con meno fogli (poi con meno area di fogli).
+
+    Ogni nuovo foglio usa il formato più grande in cui entra il pezzo che lo
+    apre, quindi un pezzo è scartato solo se non entra in nessun formato.
+    Con time_limit > 0 anche il primo passaggio rispetta la scadenza: una volta
+    superata, i pezzi rimasti provano solo l'ultimo foglio aperto.
+    Eseguita nei processi worker: deve restare a livello di modulo.
+    """
+    deadline = time.perf_counter() + time_limit
+    rng = random.Random(seed)
+    # Formati dal più grande: (formato, colonne, righe) utili al netto del bordo
+    grids = [(size, int((size[0] - 2 * margin) // resolution), int((size[1] - 2 * margin) // resolution))
+             for size in reversed(sheet_sizes)]
+    pad = int(math.ceil(spacing / (2 * resolution))) if spacing > 0 else 0
+
+    rasters: Dict[Tuple[int, float], _Raster] = {}
+    cells: Dict[Tuple[int, float], int] = {}
+    items, unplaced = [], []
+    for idx, (piece_id, quantity, polygon, area) in enumerate(shapes):
+        usable, seen = [], set()
+        for angle in rotations:
+            raster = _rasterize(_rotate(polygon, angle), resolution, pad)
+            signature = (raster.width, tuple(raster.rows))
+            if signature in seen:   # es. 0/180 per un rettangolo: stessa sagoma, inutile provarla due volte
+                continue
+            seen.add(signature)
+            if any(raster.width <= cols and raster.height <= rows for _, cols, rows in grids):
+                rasters[(idx, angle)] = raster
+                cells[(idx, angle)] = sum(bin(m).count('1') for m in raster.rows)
+                usable.append(angle)
+        if not usable:
+            unplaced.append((piece_id, quantity))
+            continue
+        items.extend([(idx, usable)] * quantity)
+
+    def open_sheet(idx: int, angles: List[float]) -> _Sheet:
+        """Nuovo foglio nel formato più grande che contiene il pezzo, con la rotazione più stretta"""
+        by_width = sorted(angles, key=lambda a: rasters[(idx, a)].width)
+        size, cols, rows, angle = next((size, cols, rows, a) for size, cols, rows in grids for a in by_width
+                                       if rasters[(idx, a)].width <= cols and rasters[(idx, a)].height <= rows)
+        sheet = _Sheet(size, cols, rows)
+        sheet.place(rasters[(idx, angle)], 0, 0, idx, angle, cells[(idx, angle)])
+        return sheet
+
+    best = None
+    attempt = 0
+    while best is None or time.perf_counter() < deadline:
+        jitter = 0.0 if attempt == 0 else 0.3
+        order = sorted(items, key=lambda it: -shapes[it[0]][3] * (1 + rng.uniform(-jitter, jitter)))
+        sheets: List[_Sheet] = []
+        next_fit = False
+        for idx, angles in order:
+            if time_limit > 0 and not next_fit and time.perf_counter() >= deadline:
+                if best is not None:
+                    break          # tentativo migliorativo fuori tempo: scartato
+                next_fit = True    # primo passaggio fuori tempo: solo l'ultimo foglio aperto
+            needed = min(cells[(idx, a)] for a in angles)
+            placed = False
+            for sheet in (sheets[-1:] if next_fit else sheets):
+                if sheet.free < needed or idx in sheet.failed:
+                    continue
+                choice = None
+                for angle in angles:
+                    pos = sheet.find(rasters[(idx, angle)])
+                    if pos is not None and (choice is None or (pos[0] + rasters[(idx, angle)].width, pos[1])
+                                            < (choice[1][0] + rasters[(idx, choice[0])].width, choice[1][1])):
+                        choice = (angle, pos)
+                if choice is not None:
+                    sheet.place(rasters[(idx, choice[0])], *choice[1], idx, choice[0], cells[(idx, choice[0])])
+                    placed = True
+                    break
+                sheet.failed.add(idx)
+            if not placed:
+                sheets.append(open_sheet(idx, angles))
+        else:
+            layouts = [_layout(sheet, shapes, rasters, sheet_sizes, margin, resolution, pad) for sheet in sheets]
+            cost = (len(layouts), sum(s.length * s.width for s in layouts))
+            if best is None or cost < best[0]:
+                best = (cost, layouts)
+        attempt += 1
+        if time_limit <= 0:
+            break
+    return best[0], best[1], unplaced
+
+
+def _layout(sheet: _Sheet, shapes, rasters, sheet_sizes, margin: float, resolution: float, pad: int) -> SheetLayout:
+    """Converte un foglio in celle in mm, scegliendo il formato più piccolo che contiene i pezzi"""
+    used_length = sheet.extent[0] * resolution + 2 * margin - pad * resolution
+    used_width = sheet.extent[1] * resolution + 2 * margin - pad * resolution
+    length, width = next(((l, w) for l, w in sheet_sizes
+                          if l + 1e-6 >= used_length and w + 1e-6 >= used_width), sheet.size)
+    layout = SheetLayout(length=length, width=width)
+    for idx, rotation, x, y in sheet.placed:
+        raster = rasters[(idx, rotation)]
+        # La cella (x, y) corrisponde all'angolo della sagoma dilatata: origin riporta alla sagoma ruotata
+        layout.placements.append(PlacedPlate(
+            piece_id=shapes[idx][0],
+            rotation=rotation,
+            dx=margin + x * resolution - raster.origin[0],
+            dy=margin + y * resolution - raster.origin[1],
+        ))
+        layout.used_area += shapes[idx][3]
+    return layout
+
+
+def _collapse(layouts: List[SheetLayout]) -> List[SheetLayout]:
+    """Raggruppa i fogli con la stessa disposizione"""
+    merged: Dict[tuple, SheetLayout] = {}
+    for layout in layouts:
+        key = (layout.length, layout.width,
+               tuple((p.piece_id, p.rotation, round(p.dx, 3), round(p.dy, 3)) for p in layout.placements))
+        if key in merged:
+            merged[key].count += 1
+        else:
+            merged[key] = layout
+    return list(merged.values())
+
+
+def _is_plate(part: Optional[NCPart]) -> bool:
+    return part is not None and part.profile_type == 'B' and bool(part.quantity) and part.quantity > 0
+
+
+def _thickness(part: NCPart) -> float:
+    return float(part.dimensions.get('thickness', 0.0))
+
+
+class PlateNester:
+    """
+    Nesting 2D delle lamiere (profile_type 'B') su fogli commerciali.
+
+    Le sagome (rettangoli di ingombro o contorni AK) sono rasterizzate su una
+    griglia di `resolution` mm con una bitmask per riga, così la verifica di
+    sovrapposizione è un AND tra interi per ogni riga della sagoma. I punti
+    candidati sono gli angoli dei pezzi già disposti; il pezzo viene poi fatto
+    scorrere in basso a sinistra. I gruppi materiale/spessore (e, con più
+    core, più tentativi per gruppo) sono eseguiti in parallelo.
+
+    Args:
+        sheet_sizes: formati dei fogli (lunghezza, larghezza) in mm
+        spacing: distanza minima tra i pezzi
+        margin: bordo non utilizzabile del foglio
+        rotation_step: passo di rotazione in gradi (90 = 0/90/180/270, 0 = nessuna rotazione)
+        resolution: lato della cella di rasterizzazione in mm
+        mode: 'bbox' (veloce) o 'contour'
+    """
+    def __init__(self, sheet_sizes: Sequence[Tuple[float, float]] = ((3000.0, 1500.0), (6000.0, 2000.0)),
+                 spacing: float = 10.0, margin: float = 10.0, rotation_step: float = 90.0,
+                 resolution: float = 5.0, mode: str = 'bbox'):
+        if not sheet_sizes:
+            raise ValueError("Serve almeno un formato di foglio")
+        if mode not in NESTING_MODES:
+            raise ValueError(f"Modalità non supportata: {mode}")
+        if resolution <= 0:
+            raise ValueError("resolution deve essere positiva")
+        self.sheet_sizes = sorted(((float(l), float(w)) for l, w in sheet_sizes), key=lambda s: s[0] * s[1])
+        self.spacing = float(spacing)
+        self.margin = float(margin)
+        step = float(rotation_step)
+        self.rotations = [i * step for i in range(int(math.ceil(360 / step - 1e-9)))] if step > 0 else [0.0]
+        self.resolution = float(resolution)
+        self.mode = mode
+
+    def nest(self, parts: Iterable[NCPart], time_limit: float = 0.0,
+             max_workers: Optional[int] = None) -> List[PlateNestingResult]:
+        """
+        Esegue il nesting delle lamiere (le parti di altro tipo sono ignorate).
+
+        Le lamiere senza spessore nell'header (es. NC1 senza dimensioni) non
+        possono essere raggruppate e sono escluse: vedi `unnestable`.
+
+        Args:
+            parts: parti già parsate
+            time_limit: secondi complessivi per i tentativi migliorativi (0 = un solo passaggio)
+            max_workers: processi paralleli (1 = tutto nel processo corrente)
+        Returns:
+            List[PlateNestingResult]: un risultato per ogni coppia materiale/spessore
+        """
+        groups: Dict[Tuple[str, float], List[Tuple[str, int, Polygon, float]]] = defaultdict(list)
+        for part in parts:
+            if not _is_plate(part) or _thickness(part) <= 0:
+                continue
+            polygon, area = plate_outline(part, self.mode)
+            key = (str(part.material).strip(), _thickness(part))
+            groups[key].append((part.piece_id, int(part.quantity), polygon, area))
+
+        workers = max_workers or os.cpu_count() or 1
+        # Con più core che gruppi, ogni gruppo ha più tentativi con semi diversi
+        attempts = max(1, workers // max(1, len(groups))) if time_limit > 0 else 1
+        tasks = [(key, seed) for key in groups for seed in range(attempts)]
+        # Il tempo complessivo (time_limit su ogni core) è ripartito in proporzione ai pezzi del gruppo
+        total_pieces = sum(q for shapes in groups.values() for _, q, _, _ in shapes) or 1
+        budgets = {key: min(time_limit, time_limit * min(workers, len(tasks)) / attempts
+                            * sum(q for _, q, _, _ in shapes) / total_pieces)
+                   for key, shapes in groups.items()}
+        args = [(groups[key], self.sheet_sizes, self.spacing, self.margin, self.rotations, self.resolution,
+                 seed, budgets[key]) for key, seed in tasks]
+        if workers == 1 or len(tasks) <= 1:
+            outcomes = [_nest_group(*a) for a in args]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(_nest_group, *zip(*args)))
+
+        best: Dict[Tuple[str, float], tuple] = {}
+        for (key, _), outcome in zip(tasks, outcomes):
+            if key not in best or outcome[0] < best[key][0]:
+                best[key] = outcome
+        return [PlateNestingResult(material=key[0], thickness=key[1], sheets=_collapse(layouts), unplaced=unplaced)
+                for key, (_, layouts, unplaced) in best.items()]
+
+    @staticmethod
+    def unnestable(parts: Iterable[NCPart]) -> List[Tuple[str, int]]:
+        """Lamiere escluse da nest perché senza spessore: (piece_id, quantità)"""
+        return [(part.piece_id, int(part.quantity)) for part in parts
+                if _is_plate(part) and _thickness(part) <= 0]
@@ -0,0 +1,88 @@
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.parsers.factory import NCFileParserFactory
+
+DSTV_EXTENSIONS = ('.nc', '.nc1')
+
+
+def gil_enabled() -> bool:
+    """False sulle build free-threaded di CPython (3.13t+) con il GIL disattivato"""
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+def iter_dstv_files(folder: Union[str, Path], recursive: bool = False) -> List[Path]:
+    """Elenca i file .nc/.nc1 di una cartella, ordinati per nome"""
+    folder = Path(folder)
+    pattern = folder.rglob('*') if recursive else folder.glob('*')
+    return sorted(p for p in pattern if p.is_file() and p.suffix.lower() in DSTV_EXTENSIONS)
+
+
+def parse_file(path: Union[str, Path], encoding: Optional[str] = None) -> Optional[NCPart]:
+    """Parsa un singolo file scegliendo il parser tramite la factory"""
+    return NCFileParserFactory.create_parser(str(path), encoding).parse()
+
+
+def parse_content(content: Union[str, bytes], filename: str, encoding: Optional[str] = None) -> Optional[NCPart]:
+    """
+    Parsa contenuto DSTV già in memoria; il formato è dedotto dall'estensione di `filename`.
+    I bytes grezzi seguono la stessa decodifica dei file (vedi TableDrivenParser).
+    """
+    parser = NCFileParserFactory.create_parser(filename, encoding)
+    if isinstance(content, bytes):
+        return parser.parse_bytes(content)
+    return parser.parse_lines(content.splitlines())
+
+
+def _apply(func: Callable[[Optional[NCPart]], Any], path: str) -> Tuple[str, Any]:
+    return path, func(parse_file(path))
+
+
+def map_parts(func: Callable[[Optional[NCPart]], Any], paths: Iterable[Union[str, Path]],
+              max_workers: Optional[int] = None, chunksize: int = 16,
+              use_threads: Optional[bool] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Parsa i file in un pool di processi (o di thread) e applica `func` alla parte nel worker.
+
+    Restituire dal worker solo il risultato di `func` (e non l'intera parte)
+    evita di serializzare la geometria tra i processi. Con i processi `func`
+    deve essere una funzione di modulo (picklable).
+
+    Args:
+        use_threads: usa un ThreadPoolExecutor; None = automatico, thread solo
+                     se il GIL è disattivato (i parser sono rientranti)
+    Yields:
+        Tuple[str, Any]: (percorso, func(parte)) nello stesso ordine di `paths`
+    """
+    paths = [str(p) for p in paths]
+    worker = partial(_apply, func)
+    if max_workers == 1 or len(paths) <= 1:
+        yield from map(worker, paths)
+        return
+    max_workers = max_workers or os.cpu_count() or 1
+    if use_threads is None:
+        use_threads = not gil_enabled()
+    # Import locale: concurrent.futures carica multiprocessing e rallenta l'avvio della CLI
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if use_threads:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(worker, paths)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(worker, paths, chunksize=chunksize)
+
+
+def _identity(part: Optional[NCPart]) -> Optional[NCPart]:
+    return part
+
+
+def parse_files(paths: Iterable[Union[str, Path]], max_workers: Optional[int] = None,
+                chunksize: int = 16, use_threads: Optional[bool] = None) -> Dict[str, Optional[NCPart]]:
+    """Parsa più file in parallelo; le parti non parsabili restano None"""
+    return dict(map_parts(_identity, paths, max_workers=max_workers, chunksize=chunksize,
+                          use_threads=use_threads))
@@ -1,13 +1,24 @@
 from typing import List, Optional
 from dstvparser.models.nc_part import NCPart
 
+class ParseState:
+    """
+    Stato mutabile di un singolo parsing (profilo in costruzione e faccia
+    corrente). Viene creato a ogni chiamata di parse_lines
+    e passato ai metodi di parsing: l'istanza del parser resta immutabile e
+    può essere condivisa tra thread.
+    """
+    __slots__ = ('profile', 'face_type')
+
+    def __init__(self):
+        self.profile: Optional[NCPart] = None
+        self.face_type: Optional[str] = None
+
+
 class DSTVFileParser:
     """Classe base per parser di file NC/NC1"""
     def __init__(self, filename: str):
         self.filename = filename
-        self.current_profile = None
-        self.current_face_type = None
-        self.current_points = []
         self.debug = False
         self.log_sections = {
             'BO': False,
@@ -25,6 +36,14 @@ class DSTVFileParser:
         """Metodo principale di parsing del file - da implementare nelle sottoclassi"""
         raise NotImplementedError("Il metodo parse deve essere implementato nelle sottoclassi")
     
-    def _create_profile_from_header(self, header_lines: List[str]):
+    def parse_lines(self, lines: List[str]) -> Optional[NCPart]:
+        """Parsing di linee già lette - da implementare nelle sottoclassi"""
+        raise NotImplementedError("Il metodo parse_lines deve essere implementato nelle sottoclassi")
+
+    def parse_bytes(self, data: bytes) -> Optional[NCPart]:
+        """Parsing del contenuto grezzo di un file - da implementare nelle sottoclassi"""
+        raise NotImplementedError("Il metodo parse_bytes deve essere implementato nelle sottoclassi")
+
+    def _create_profile_from_header(self, header_lines: List[str]) -> NCPart:
         """Metodo base per creare profilo dall'header - potrebbe essere sovrascritto"""
         raise NotImplementedError("Metodo da implementare nelle sottoclassi")
\ No newline at end of file
@@ -1,20 +1,24 @@
+from typing import Optional
+
 from dstvparser.parsers.nc_file_parser import NCFileParser
 from dstvparser.parsers.nc1_file_parser import NC1FileParser
 from dstvparser.parsers.dstv_file_parser import DSTVFileParser
+from dstvparser.parsers.table_parser import TableDrivenParser, format_for_filename
 
 class NCFileParserFactory:
     """Factory per creare il parser appropriato in base all'estensione del file"""
+    PARSERS = {'NC': NCFileParser, 'NC1': NC1FileParser}
+
     @staticmethod
-    def create_parser(filename: str) -> DSTVFileParser:
-        """Crea il parser appropriato in base all'estensione del file"""
+    def create_parser(filename: str, encoding: Optional[str] = None) -> DSTVFileParser:
+        """
+        Crea il parser appropriato in base all'estensione del file; i formati
+        aggiunti a FORMAT_SCHEMAS senza una classe dedicata usano il motore generico.
+        `encoding` vale per i campi di testo dell'header (None = rilevato).
+        """
         filename = str(filename)
-
-        if filename.lower().endswith('.nc'):
-            return NCFileParser(filename)
-        
-        elif filename.lower().endswith('.nc1'):
-            return NC1FileParser(filename)
-        
-        else:
-            raise ValueError(f"Formato file non supportato: {filename}")
-        
+        file_type = format_for_filename(filename)   # ValueError se l'estensione non è supportata
+        parser_class = NCFileParserFactory.PARSERS.get(file_type)
+        if parser_class is not None:
+            return parser_class(filename, encoding=encoding)
+        return TableDrivenParser(filename, file_type, encoding)
@@ -0,0 +1,253 @@
+import mmap
+import os
+from string import ascii_letters
+from typing import Any, Dict, Iterable, List, Optional
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.parsers.dstv_file_parser import DSTVFileParser, ParseState
+from dstvparser.utils.profile_schemas import BLOCK_CODES, FORMAT_SCHEMAS, PROFILE_SCHEMAS
+
+FACES = frozenset('ouvh')
+MMAP_THRESHOLD = 1 << 20          # file più grandi sono letti tramite mmap, riga per riga
+FALLBACK_ENCODING = 'cp1252'      # export CAD Windows (es. '°' nei nomi)
+UTF8_BOM = b'\xef\xbb\xbf'
+
+_BLOCK_CODES = frozenset(code.encode('ascii') for code in BLOCK_CODES)
+_FACE_NAMES = {face.encode('ascii'): face for face in FACES}
+_FACE_CODES = frozenset(b'ouvh')   # line[0] su bytes è un intero
+_LETTERS = ascii_letters.encode('ascii')
+_LETTER_CODES = frozenset(_LETTERS)
+
+
+def _to_float(token: bytes) -> float:
+    """
+    Come convert_to_float ma senza regex e direttamente sui bytes; il suffisso
+    (es. "130.02u") è tolto solo se l'ultimo byte è una lettera, senza passare
+    da un'eccezione.
+    """
+    if token[-1] in _LETTER_CODES:
+        token = token.rstrip(_LETTERS)
+    return float(token)
+
+
+def _header_float(value: bytes) -> float:
+    return float(value.split(b',')[0].strip())   # pulisce valori tipo "1000,0"
+
+
+def _face(token: bytes) -> str:
+    return _FACE_NAMES.get(token) or token.decode('latin-1')
+
+
+def decode_field(value: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Decodifica un campo di testo dell'header. Senza encoding esplicito prova
+    UTF-8 e ripiega su cp1252; i byte non validi sono sostituiti, mai un errore.
+    """
+    if encoding is not None:
+        return value.decode(encoding, errors='replace')
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return value.decode(FALLBACK_ENCODING, errors='replace')
+
+
+def format_for_filename(filename: str) -> str:
+    """Formato (chiave di FORMAT_SCHEMAS) in base all'estensione del file"""
+    lower = str(filename).lower()
+    for file_type, schema in FORMAT_SCHEMAS.items():
+        if any(lower.endswith(ext) for ext in schema['extensions']):
+            return file_type
+    raise ValueError(f"Formato file non supportato: {filename}")
+
+
+class TableDrivenParser(DSTVFileParser):
+    """
+    Motore di parsing unico per i formati DSTV descritti in FORMAT_SCHEMAS.
+
+    Le differenze tra i formati (posizioni dei campi nell'header, numero di
+    token dei fori, contorni con la faccia solo sulla prima riga...) sono
+    dati del descrittore; il ciclo sulle righe è lo stesso per tutti.
+    I codici di blocco (ST, BO, AK...) sono riconosciuti solo se occupano
+    l'intera riga, così un materiale come "ST37" non apre un nuovo header;
+    dentro l'header valgono solo dopo i campi obbligatori, così un tipo
+    profilo o una marca di due lettere (RO, RU, E1...) restano valori.
+
+    Il parsing lavora sui bytes: i numeri sono convertiti direttamente dai
+    token e solo i campi di testo dell'header vengono decodificati, con
+    `encoding` se indicato, altrimenti UTF-8 con ripiego su cp1252.
+    """
+    FILE_TYPE: Optional[str] = None
+
+    def __init__(self, filename: str, file_type: Optional[str] = None, encoding: Optional[str] = None):
+        super().__init__(filename)
+        self.file_type = file_type or self.FILE_TYPE or format_for_filename(filename)
+        self.schema: Dict[str, Any] = FORMAT_SCHEMAS[self.file_type]
+        self.encoding = encoding
+        self._sections = {code.encode('ascii'): section for code, section in self.schema['sections'].items()}
+        self._block_codes = _BLOCK_CODES | frozenset(self._sections)
+        self._header_fields = max(self.schema['header']['fields'].values()) + 1
+
+    def parse(self) -> Optional[NCPart]:
+        """Legge il file e ne esegue il parsing; i file grandi sono mappati in memoria invece che letti interi"""
+        self.log(f"\nInizio parsing del file {self.file_type}: {self.filename}")
+        try:
+            with open(self.filename, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+                    return self.parse_bytes(file.read())
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    encoding = self.encoding
+                    if mapped[:3] == UTF8_BOM:
+                        mapped.seek(3)
+                        encoding = encoding or 'utf-8'
+                    return self._parse_byte_lines(iter(mapped.readline, b''), encoding)
+        except Exception as e:
+            self.log(f"ERRORE in lettura del file {self.file_type}: {e}")
+            return None
+
+    def parse_bytes(self, data: bytes) -> Optional[NCPart]:
+        """Parsing del contenuto grezzo di un file"""
+        encoding = self.encoding
+        if data.startswith(UTF8_BOM):
+            data = data[3:]
+            encoding = encoding or 'utf-8'
+        return self._parse_byte_lines(data.splitlines(), encoding)
+
+    def parse_lines(self, lines: Iterable[str]) -> Optional[NCPart]:
+        """Parsing del contenuto già letto come testo (es. ricevuto via rete)"""
+        return self._parse_byte_lines((line.encode('utf-8', errors='surrogateescape') for line in lines), 'utf-8')
+
+    def _parse_byte_lines(self, lines: Iterable[bytes], encoding: Optional[str]) -> Optional[NCPart]:
+        schema = self.schema
+        sections = self._sections
+        block_codes = self._block_codes
+        header_fields = self._header_fields
+        face_on_every_line = schema['face_on_every_line']
+        debug = self.debug
+        state = ParseState()
+        header: Optional[List[bytes]] = None   # righe dell'header finché è aperto
+        section = None
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                if debug:
+                    self.log(f"Processo linea {self.file_type}: '{line.decode('latin-1')}'")
+
+                # Codice di blocco: una riga con esattamente uno dei codici noti
+                if len(line) == 2 and line in block_codes and (header is None or len(header) >= header_fields):
+                    if header is not None:
+                        state.profile = self._create_profile_from_header(header, encoding)
+                        header = None
+                    if line == b'ST':
+                        header = []
+                    elif line == b'EN':
+                        self.log(f"Fine file {self.file_type}")
+                        break
+                    section = sections.get(line)
+                    state.face_type = None
+                    continue
+
+                if header is not None:
+                    header.append(line)
+                    continue
+                if section is None or state.profile is None:
+                    continue
+                if face_on_every_line and line[0] not in _FACE_CODES:
+                    continue
+
+                tokens = line.split()
+                if section == 'BO':
+                    self._parse_bo_line(state, tokens, line)
+                elif section == 'AK':
+                    self._parse_contour(state, tokens, line)
+                elif debug:
+                    self.log(f"Ignorata linea SI: {line.decode('latin-1')}", section='SI')
+            return state.profile
+
+        except Exception as e:
+            self.log(f"ERRORE durante il parsing {self.file_type}: {e}")
+            import traceback
+            self.log(traceback.format_exc())
+            return state.profile if schema['partial_on_error'] else None
+
+    def _create_profile_from_header(self, header_lines: List[bytes], encoding: Optional[str] = None) -> NCPart:
+        """Crea il profilo dalle righe dell'header secondo il descrittore del formato"""
+        encoding = encoding or self.encoding
+        fields = self.schema['header']['fields']
+        profile_type = decode_field(header_lines[fields['profile_type']], encoding)
+        self.log(f"\nCreazione profilo da header {self.file_type}, tipo: {profile_type}", section='header')
+
+        profile_schema = PROFILE_SCHEMAS.get(profile_type)
+        if profile_schema is None:
+            raise ValueError(f"Profilo '{profile_type}' non riconosciuto")
+        indices = profile_schema.get('indices', {}).get(self.file_type, [])
+        dimensions = {name: _header_float(header_lines[idx])
+                      for name, idx in zip(profile_schema.get('fields', []), indices)}
+
+        profile = NCPart(
+            order_id=decode_field(header_lines[fields['order_id']], encoding),
+            piece_id=decode_field(header_lines[fields['piece_id']], encoding),
+            material=decode_field(header_lines[fields['material']], encoding),
+            quantity=int(header_lines[fields['quantity']]),
+            profile_type=profile_type,
+            code_profile=decode_field(header_lines[fields['code_profile']], encoding),
+            length=_header_float(header_lines[fields['length']]),
+            dimensions=dimensions
+        )
+        self.log(f"Creato profilo tipo {profile_type}: {profile.code_profile}")
+        self.log(f"Dimensioni: {dimensions}", section='header')
+        return profile
+
+    def _parse_bo_line(self, state: ParseState, tokens: List[bytes], line: bytes):
+        """Riga BO: asola se contiene un token con 'l' dopo il diametro, altrimenti foro"""
+        if b'l' in line and self._parse_slot(state, tokens):
+            return
+        if len(tokens) in self.schema['hole_tokens']:
+            type_token = self.schema['hole_type_token']
+            try:
+                state.profile.add_hole(_to_float(tokens[1]), _to_float(tokens[2]), _to_float(tokens[3]),
+                                       _to_float(tokens[type_token]) if type_token is not None else 'normal',
+                                       _face(tokens[0]))
+                return
+            except ValueError:
+                pass
+        self.log(f"Linea BO non riconosciuta: {line.decode('latin-1')}", section='BO')
+
+    def _parse_slot(self, state: ParseState, tokens: List[bytes]) -> bool:
+        """Asola: faccia x y diametro ... <tipo>l cc_distance altezza [angolo]"""
+        for i in range(4, len(tokens)):
+            if b'l' not in tokens[i]:
+                continue
+            try:
+                diameter = _to_float(tokens[3])
+                cc_distance = _to_float(tokens[i + 1])
+                height = _to_float(tokens[i + 2])
+                angle = _to_float(tokens[i + 3]) if len(tokens) > i + 3 else 0.0
+                state.profile.add_slot(_to_float(tokens[1]), _to_float(tokens[2]), diameter, _to_float(tokens[i]),
+                                       cc_distance, height, angle, diameter + cc_distance, _face(tokens[0]))
+                return True
+            except (ValueError, IndexError) as e:
+                self.log(f"Asola non valida: {e}", section='BO')
+                return False
+        return False
+
+    def _parse_contour(self, state: ParseState, tokens: List[bytes], line: bytes):
+        """Punto di contorno: faccia x y raggio, oppure x y raggio sulle righe di continuazione"""
+        if len(tokens) < self.schema['contour_min_tokens']:
+            self.log(f"Linea AK non riconosciuta: {line.decode('latin-1')}", section='AK')
+            return
+        try:
+            face = _FACE_NAMES.get(tokens[0])
+            if face is not None:
+                state.face_type = face
+                x, y, angle = _to_float(tokens[1]), _to_float(tokens[2]), _to_float(tokens[3])
+            elif self.schema['contour_continuation'] and state.face_type is not None:
+                x, y, angle = _to_float(tokens[0]), _to_float(tokens[1]), _to_float(tokens[2])
+            else:
+                self.log(f"Linea AK non riconosciuta: {line.decode('latin-1')}", section='AK')
+                return
+        except ValueError:
+            self.log(f"Linea AK non riconosciuta: {line.decode('latin-1')}", section='AK')
+            return
+        state.profile.add_contour_points(state.face_type, [(x, y, angle)])
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.parsers.batch import parse_content
+from dstvparser.utils.face_edge_schemas import FACE_EDGE_SCHEMAS
+from dstvparser.utils.faces_name_schemas import FACES_NAME_SCHEMAS
+from dstvparser.utils.geometry import slot_axis, split_contour_loops
+
+# Da incrementare quando cambia l'aspetto delle miniature: invalida la cache
+RENDER_VERSION = 1
+FACES = ('o', 'v', 'u', 'h')
+
+STYLE = {
+    'contour': 'fill:#e8edf2;stroke:#1f3a5f;stroke-width:{w}',
+    'hole': 'fill:#ffffff;stroke:#c0392b;stroke-width:{w}',
+    'slot': 'fill:none;stroke:#d35400;stroke-linecap:round',
+    'label': 'font-family:sans-serif;font-size:{s}px;fill:#333333',
+}
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def _face_elements(part: NCPart, face: str, stroke: float) -> Tuple[List[str], Tuple[float, float, float, float]]:
+    """Elementi SVG di una faccia in coordinate DSTV e relativo bounding box"""
+    elements = []
+    loops = split_contour_loops(getattr(part, f"{face}_contour"))
+    if loops:
+        xs = [x for loop in loops for x, _ in loop]
+        ys = [y for loop in loops for _, y in loop]
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        # Un unico path con regola evenodd: le IK restano vuote
+        d = ' '.join('M' + ' L'.join(f"{_fmt(x)},{_fmt(y)}" for x, y in loop) + ' Z' for loop in loops)
+        elements.append(f'<path d="{d}" fill-rule="evenodd" style="{STYLE["contour"].format(w=_fmt(stroke))}"/>')
+    else:
+        width_field = FACE_EDGE_SCHEMAS.get(part.profile_type, {}).get(face, (None, None))[0]
+        width = part.dimensions.get(width_field, 0.0) if width_field else 0.0
+        bbox = (0.0, 0.0, float(part.length), float(width))
+        elements.append(f'<rect x="0" y="0" width="{_fmt(bbox[2])}" height="{_fmt(bbox[3])}" '
+                        f'style="{STYLE["contour"].format(w=_fmt(stroke))}"/>')
+
+    hole_style = STYLE['hole'].format(w=_fmt(stroke))
+    for hole in part.holes:
+        if hole.face == face:
+            elements.append(f'<circle cx="{_fmt(hole.x)}" cy="{_fmt(hole.y)}" r="{_fmt(hole.diameter / 2)}" '
+                            f'style="{hole_style}"/>')
+    for slot in part.slots:
+        if slot.face == face:
+            x1, y1, x2, y2 = slot_axis(slot)
+            elements.append(f'<line x1="{_fmt(x1)}" y1="{_fmt(y1)}" x2="{_fmt(x2)}" y2="{_fmt(y2)}" '
+                            f'stroke-width="{_fmt(slot.diameter)}" style="{STYLE["slot"]}"/>')
+    return elements, bbox
+
+
+def _faces_to_draw(part: NCPart, face: Optional[str]) -> List[str]:
+    if face is not None:
+        return [face]
+    names = FACES_NAME_SCHEMAS.get(part.profile_type, {})
+    faces = [f for f in FACES if f in names or part.has_contour(f)]
+    return faces or [f for f in FACES if part.has_contour(f)]
+
+
+def render_part_svg(part: NCPart, face: Optional[str] = None, width: int = 480, margin: float = 10.0,
+                    labels: bool = True) -> str:
+    """
+    Disegna una parte (o una sola faccia) come SVG.
+
+    Le facce sono impilate verticalmente con il nome da FACES_NAME_SCHEMAS;
+    l'asse y DSTV (verso l'alto) viene ribaltato per l'SVG.
+
+    Args:
+        part: parte parsata
+        face: 'o', 'u', 'v', 'h' oppure None per tutte le facce del profilo
+        width: larghezza in pixel dell'immagine
+        margin: margine in mm attorno a ogni faccia
+        labels: aggiunge il nome della faccia
+    """
+    faces = _faces_to_draw(part, face)
+    span = max(float(part.length or 0.0), 1.0)
+    stroke = span / width            # circa un pixel
+    label_size = 12 * stroke
+    names = FACES_NAME_SCHEMAS.get(part.profile_type, {})
+
+    groups = []
+    offset_y = margin
+    for name in faces:
+        elements, (min_x, min_y, max_x, max_y) = _face_elements(part, name, stroke)
+        span = max(span, max_x - min_x)
+        if labels:
+            offset_y += label_size * 1.4
+            groups.append(f'<text x="{_fmt(margin)}" y="{_fmt(offset_y - label_size * 0.3)}" '
+                          f'style="{STYLE["label"].format(s=_fmt(label_size))}">'
+                          f'{escape(f"{name}: {names.get(name, name)}")}</text>')
+        # Ribalta y e porta la faccia in (margin, offset_y)
+        groups.append(f'<g transform="translate({_fmt(margin - min_x)},{_fmt(offset_y + max_y)}) scale(1,-1)">'
+                      + ''.join(elements) + '</g>')
+        offset_y += (max_y - min_y) + margin
+
+    view_w = span + 2 * margin
+    view_h = max(offset_y, 1.0)
+    height = max(1, round(width * view_h / view_w))
+    title = escape(f"{part.piece_id} {part.code_profile}")
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {_fmt(view_w)} {_fmt(view_h)}"><title>{title}</title>'
+            + ''.join(groups) + '</svg>')
+
+
+class SVGThumbnailCache:
+    """
+    Cache su disco delle miniature SVG, indicizzata sull'hash del contenuto
+    del file DSTV e delle opzioni di disegno. Quando supera `max_bytes`
+    elimina le miniature usate meno di recente (mtime aggiornato a ogni hit).
+    """
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(content: bytes, face: Optional[str] = None, width: int = 480) -> str:
+        digest = hashlib.blake2b(content, digest_size=20)
+        digest.update(f"|{face}|{width}|v{RENDER_VERSION}".encode('ascii'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # Due livelli di sottocartelle per non avere decine di migliaia di file in una sola
+        return self.cache_dir / key[:2] / f"{key}.svg"
+
+    def touch(self, key: str) -> bool:
+        """True se la miniatura esiste; ne aggiorna l'mtime per l'eviction LRU"""
+        try:
+            os.utime(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.touch(key):
+            return None
+        try:
+            return self._path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:   # rimossa da un'eviction concorrente
+            return None
+
+    def put(self, key: str, svg: str) -> Path:
+        """Scrittura atomica: file temporaneo nella stessa cartella e os.replace"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(svg)
+            os.replace(tmp, path)
+        except BaseException:
+            # Disco pieno o interruzione: il file temporaneo non deve restare nella cache
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return path
+
+    def render_file(self, path: Union[str, Path], face: Optional[str] = None, width: int = 480) -> Optional[Tuple[Path, bool]]:
+        """
+        Restituisce (percorso della miniatura, trovata_in_cache) per un file DSTV,
+        disegnandola solo se manca. None se il file non è parsabile.
+        """
+        path = Path(path)
+        content = path.read_bytes()
+        key = self.key(content, face, width)
+        if self.touch(key):
+            return self._path(key), True
+        part = parse_content(content, path.name)
+        if part is None:
+            return None
+        return self.put(key, render_part_svg(part, face=face, width=width)), False
+
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.cache_dir.glob('*/*.svg'))
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Elimina le miniature meno recenti finché la cache sta nel limite; restituisce i file eliminati"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for file in self.cache_dir.glob('*/*.svg'):
+            stat = file.stat()
+            entries.append((stat.st_mtime, stat.st_size, file))
+            total += stat.st_size
+        removed = 0
+        if total <= limit:
+            return removed
+        for _, size, file in sorted(entries):
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            total -= size
+            if total <= limit * 0.9:   # un po' di margine per non rifare la scansione subito
+                break
+        return removed
+
+
+def _render_cached(path: str, cache_dir: str, max_bytes: int, face: Optional[str], width: int):
+    try:
+        result = SVGThumbnailCache(cache_dir, max_bytes).render_file(path, face, width)
+    except (OSError, ValueError):   # file illeggibile o estensione non supportata
+        return None
+    return None if result is None else (str(result[0]), result[1])
+
+
+def render_job(paths: Iterable[Union[str, Path]], cache: SVGThumbnailCache, face: Optional[str] = None,
+               width: int = 480, max_workers: Optional[int] = None, chunksize: int = 32
+               ) -> Dict[str, Optional[Tuple[str, bool]]]:
+    """
+    Genera in parallelo le miniature di una commessa usando la cache su disco.
+
+    Ogni worker legge e calcola l'hash del file da sé, quindi le miniature già
+    presenti non vengono né parsate né trasferite tra processi. L'eviction
+    è eseguita una sola volta alla fine.
+
+    Returns:
+        Dict[str, Optional[Tuple[str, bool]]]: percorso file -> (percorso miniatura, cache hit)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = [str(p) for p in paths]
+    worker = partial(_render_cached, cache_dir=str(cache.cache_dir), max_bytes=cache.max_bytes,
+                     face=face, width=width)
+    if max_workers == 1 or len(paths) <= 1:
+        results = dict(zip(paths, map(worker, paths)))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            results = dict(zip(paths, executor.map(worker, paths, chunksize=chunksize)))
+    cache.evict()
+    return results
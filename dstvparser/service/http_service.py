@@ -0,0 +1,324 @@
+"""
+Servizio HTTP locale di parsing DSTV (solo libreria standard).
+
+Endpoint:
+    GET  /health          stato del servizio
+    GET  /metrics         latenza, throughput e cache (aggregati su tutti i worker)
+    POST /parse           {"path": ...} oppure {"content": ..., "filename": "x.nc"}, "mode": header|summary|full
+    POST /parse/batch     {"items": [{...}, ...], "mode": ...}
+
+Il processo principale apre il socket e genera (fork) un pool di worker che
+accettano connessioni sullo stesso socket; ogni worker serve le connessioni
+keep-alive con un thread ciascuna e tiene una propria cache LRU dei risultati,
+indicizzata sull'hash del contenuto.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Any, List, Optional, Tuple
+
+from dstvparser.parsers.batch import DSTV_EXTENSIONS, parse_content
+from dstvparser.utils.serialization import OUTPUT_MODES, part_to_dict
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class LRUCache:
+    """Cache LRU thread-safe"""
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ServiceMetrics:
+    """Contatori in memoria condivisa, visibili da tutti i worker generati con fork"""
+    COUNTERS = ('requests', 'errors', 'items', 'cache_hits', 'cache_misses', 'latency_sum')
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self._lock = multiprocessing.Lock()
+        self._counters = multiprocessing.RawArray('d', len(self.COUNTERS))
+        self._histogram = multiprocessing.RawArray('d', len(self.BUCKETS_MS) + 1)
+        self.started = time.time()
+
+    def record(self, latency: float, items: int = 0, hits: int = 0, misses: int = 0, error: bool = False):
+        latency_ms = latency * 1000.0
+        bucket = next((i for i, bound in enumerate(self.BUCKETS_MS) if latency_ms <= bound), len(self.BUCKETS_MS))
+        with self._lock:
+            counters = self._counters
+            counters[0] += 1
+            counters[1] += 1 if error else 0
+            counters[2] += items
+            counters[3] += hits
+            counters[4] += misses
+            counters[5] += latency
+            self._histogram[bucket] += 1
+
+    def _percentile(self, histogram: List[float], total: float, p: float) -> Optional[float]:
+        if not total:
+            return None
+        cumulative = 0.0
+        for i, count in enumerate(histogram):
+            cumulative += count
+            if cumulative >= total * p:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else None
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(zip(self.COUNTERS, self._counters))
+            histogram = list(self._histogram)
+        uptime = time.time() - self.started
+        requests = counters['requests']
+        return {
+            'uptime_s': round(uptime, 3),
+            'requests': int(requests),
+            'errors': int(counters['errors']),
+            'items': int(counters['items']),
+            'cache_hits': int(counters['cache_hits']),
+            'cache_misses': int(counters['cache_misses']),
+            'latency_avg_ms': round(counters['latency_sum'] / requests * 1000.0, 3) if requests else None,
+            # Percentili stimati come limite superiore del bucket dell'istogramma
+            'latency_p50_ms': self._percentile(histogram, requests, 0.50),
+            'latency_p95_ms': self._percentile(histogram, requests, 0.95),
+            'latency_p99_ms': self._percentile(histogram, requests, 0.99),
+            'requests_per_s': round(requests / uptime, 3) if uptime > 0 else None,
+            'items_per_s': round(counters['items'] / uptime, 3) if uptime > 0 else None,
+            'latency_histogram_ms': {
+                **{f"<={bound}": int(histogram[i]) for i, bound in enumerate(self.BUCKETS_MS)},
+                f">{self.BUCKETS_MS[-1]}": int(histogram[-1]),
+            },
+        }
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    service: 'ParseService'
+
+
+class _ParseRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    timeout = 30                    # chiude le connessioni keep-alive inattive
+    server: _ThreadingHTTPServer
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'pid': os.getpid()})
+        elif self.path == '/metrics':
+            metrics = service.metrics.snapshot()
+            metrics['workers'] = service.workers
+            self._send_json(200, metrics)
+        else:
+            self._send_json(404, {'error': f"Endpoint non trovato: {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        start = time.perf_counter()
+        status, payload, items, hits, misses = 500, None, 0, 0, 0
+        try:
+            length = self.headers.get('Content-Length') or '0'
+            if not length.isdigit():
+                status, payload = 400, {'error': f"Content-Length non valido: {length}"}
+                self.close_connection = True
+                return
+            length = int(length)
+            if length > MAX_BODY_SIZE:
+                status, payload = 413, {'error': "Richiesta troppo grande"}
+                self.close_connection = True
+                return
+            request = json.loads(self.rfile.read(length) or b'{}')
+            mode = request.get('mode', 'summary')
+            if mode not in OUTPUT_MODES:
+                status, payload = 400, {'error': f"Modalità non supportata: {mode}"}
+            elif self.path == '/parse':
+                result, hit = service.process_item(request, mode)
+                items, hits, misses = 1, int(hit), int(not hit)
+                status, payload = (422 if 'error' in result else 200), result
+            elif self.path == '/parse/batch':
+                results = []
+                for item in request.get('items', []):
+                    result, hit = service.process_item(item, mode)
+                    results.append(result)
+                    hits += int(hit)
+                    misses += int(not hit)
+                items = len(results)
+                status, payload = 200, {'results': results}
+            else:
+                status, payload = 404, {'error': f"Endpoint non trovato: {self.path}"}
+        except (ValueError, TypeError, AttributeError) as e:
+            status, payload = 400, {'error': f"Richiesta non valida: {e}"}
+        except Exception as e:
+            status, payload = 500, {'error': f"Errore interno: {type(e).__name__}: {e}"}
+        finally:
+            # Registrata prima della risposta: chi legge /metrics subito dopo vede già la richiesta
+            service.metrics.record(time.perf_counter() - start, items, hits, misses, error=status >= 400)
+            self._send_json(status, payload)
+
+
+class ParseService:
+    """
+    Servizio HTTP di parsing con pool di worker pre-generati.
+
+    Args:
+        host, port: indirizzo di ascolto (port=0 sceglie una porta libera)
+        workers: numero di processi worker (1 = nessun fork)
+        cache_size: elementi della cache LRU di ogni worker
+        root: se indicato, le richieste con "path" sono limitate a questa cartella;
+            altrimenti è leggibile qualunque file DSTV accessibile al processo
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, workers: Optional[int] = None,
+                 cache_size: int = 1024, root: Optional[str] = None, verbose: bool = False):
+        if not hasattr(os, 'fork'):
+            workers = 1
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.cache = LRUCache(cache_size)
+        self.metrics = ServiceMetrics()
+        self.root = Path(root).resolve() if root else None
+        self.verbose = verbose
+        self._server = _ThreadingHTTPServer((host, port), _ParseRequestHandler)
+        self._server.service = self
+        self._children: List[int] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def _read_item(self, item: dict) -> Tuple[bytes, str]:
+        if 'content' in item:
+            filename = item.get('filename') or f"content.{item.get('format', 'nc').lower().lstrip('.')}"
+            return item['content'].encode('utf-8'), filename
+        if 'path' in item:
+            path = Path(item['path']).resolve()
+            if path.suffix.lower() not in DSTV_EXTENSIONS:
+                raise PermissionError(f"Non è un file DSTV: {path}")
+            if self.root is not None and self.root not in path.parents:
+                raise PermissionError(f"Percorso fuori dalla cartella consentita: {path}")
+            return path.read_bytes(), str(path)
+        raise ValueError("Serve 'content' oppure 'path'")
+
+    def process_item(self, item: dict, mode: str) -> Tuple[dict, bool]:
+        """Parsa un elemento della richiesta; restituisce (risultato, trovato_in_cache)"""
+        try:
+            data, filename = self._read_item(item)
+            suffix = Path(filename).suffix.lower()
+            key = (hashlib.blake2b(data, digest_size=16).digest(), suffix, mode)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, True
+            part = parse_content(data, filename)
+            if part is None:
+                return {'error': f"Parsing fallito: {filename}"}, False
+            result = part_to_dict(part, mode)
+            self.cache.put(key, result)
+            return result, False
+        except (OSError, ValueError) as e:
+            return {'error': str(e)}, False
+
+    def start(self):
+        """Avvia il servizio in background (worker figli, oppure un thread se workers == 1)"""
+        if self.workers == 1:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+            return
+        for _ in range(self.workers):
+            pid = os.fork()
+            if pid == 0:
+                self._run_child()
+            self._children.append(pid)
+
+    def _run_child(self):
+        signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            self._server.serve_forever()
+        finally:
+            os._exit(0)
+
+    def serve_forever(self):
+        """Avvia il servizio e resta in attesa fino a Ctrl+C / SIGTERM"""
+        self.start()
+        try:
+            if self._thread is not None:
+                self._thread.join()
+            else:
+                for pid in self._children:
+                    os.waitpid(pid, 0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Ferma i worker e chiude il socket"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children = []
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servizio HTTP locale di parsing DSTV")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--root', default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    service = ParseService(args.host, args.port, args.workers, args.cache_size, args.root, args.verbose)
+    print(f"In ascolto su http://{service.address[0]}:{service.address[1]} con {service.workers} worker")
+    service.serve_forever()
@@ -0,0 +1,12 @@
+# Per tipo profilo e faccia: (campo dimensione con la larghezza della faccia,
+# campo con la fascia non forabile su entrambi i bordi, es. spessore ali sull'anima)
+FACE_EDGE_SCHEMAS = {
+    'I': {'o': ('flange_width', None), 'u': ('flange_width', None), 'v': ('profile_height', 'flange_thickness')},
+    'U': {'o': ('flange_width', None), 'u': ('flange_width', None), 'v': ('profile_height', 'thickness')},
+    'C': {'o': ('flange_width', None), 'u': ('flange_width', None), 'v': ('web_height', 'thickness')},
+    'L': {'u': ('width', None), 'v': ('height', None)},
+    'B': {'v': ('width', None)},
+    'M': {'o': ('side_2_size', 'thickness'), 'u': ('side_2_size', 'thickness'),
+          'v': ('side_1_size', 'thickness'), 'h': ('side_1_size', 'thickness')},
+    'T': {'o': ('web_height', None), 'h': ('flange_width', None)},
+}
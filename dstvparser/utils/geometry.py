@@ -0,0 +1,31 @@
+import math
+from typing import List, Tuple
+
+from dstvparser.models.nc_part import Slot
+
+
+def split_contour_loops(points: List[Tuple[float, float, float]], tolerance: float = 1e-3) -> List[List[Tuple[float, float]]]:
+    """
+    Divide la lista di punti di una faccia nei singoli anelli chiusi.
+    AK e IK della stessa faccia finiscono nello stesso contorno: un anello
+    termina quando un punto torna sul primo punto dell'anello.
+    """
+    loops = []
+    current: List[Tuple[float, float]] = []
+    for x, y, _ in points:
+        current.append((x, y))
+        if len(current) > 2 and abs(x - current[0][0]) <= tolerance and abs(y - current[0][1]) <= tolerance:
+            loops.append(current)
+            current = []
+    if len(current) > 2:
+        current.append(current[0])
+        loops.append(current)
+    return loops
+
+
+def slot_axis(slot: Slot) -> Tuple[float, float, float, float]:
+    """Estremi (x1, y1, x2, y2) dell'asse dell'asola: centro + allungamento ruotato dell'angolo"""
+    angle = math.radians(slot.angle or 0.0)
+    ox = slot.cc_distance * math.cos(angle) - slot.height * math.sin(angle)
+    oy = slot.cc_distance * math.sin(angle) + slot.height * math.cos(angle)
+    return slot.x, slot.y, slot.x + ox, slot.y + oy
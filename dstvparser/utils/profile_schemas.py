@@ -71,6 +71,71 @@ PROFILE_SCHEMAS = { # 'I' profiles
     }
 }
 
+# Codici di blocco DSTV: riconosciuti solo se la riga contiene esattamente il codice
+BLOCK_CODES = frozenset(('ST', 'EN', 'BO', 'SI', 'AK', 'IK', 'PU', 'KO', 'SC', 'TO', 'UE', 'PR', 'KA', 'EB', 'VB',
+                         'RT', 'WA', 'FP', 'LP', 'E0', 'E1', 'E2', 'E3', 'E4', 'E5', 'E6', 'E7', 'E8', 'E9'))
+
+# Posizioni dei campi nell'header (righe non vuote dopo ST), come lette dai parser.
+# 'size' è il numero di righe non vuote dell'header; le dimensioni seguono
+# gli indici di PROFILE_SCHEMAS. 'lines' sono le altre righe con lo stesso
+# significato nei due layout (usate per convertire da un layout all'altro):
+# disegno, fase e l'inizio dei PROFILE_VALUES valori numerici del profilo
+# (altezza, larghezza, spessori, raggio, peso, superficie, tagli inclinati).
+PROFILE_VALUES = 11
+HEADER_SCHEMAS = {
+    'NC': {
+        'fields': {'order_id': 0, 'piece_id': 3, 'material': 4, 'quantity': 5,
+                   'code_profile': 6, 'profile_type': 7, 'length': 8},
+        'lines': {'drawing': 1, 'phase': 2, 'profile_values': 9},
+        'size': 24,
+        'text_lines': 4,     # righe di testo libero in coda ('-' se vuote)
+    },
+    'NC1': {
+        'fields': {'order_id': 1, 'piece_id': 2, 'quantity': 3, 'material': 5,
+                   'code_profile': 7, 'profile_type': 8, 'length': 9},
+        'lines': {'drawing': 4, 'phase': 6, 'profile_values': 10},
+        'size': 21,
+        'comment_line': 0,   # "** nomefile.nc1"
+        'text_lines': 4,     # righe di testo libero in coda, vuote nei file NC1
+    },
+}
+
+# Descrittori dei formati per il motore di parsing (parsers/table_parser.py):
+# un nuovo dialetto si aggiunge qui, senza scrivere un'altra sottoclasse.
+#   extensions:        estensioni gestite dalla factory
+#   header:            posizioni dei campi (HEADER_SCHEMAS); le dimensioni da PROFILE_SCHEMAS[...]['indices'][formato]
+#   sections:          blocco -> sezione del motore ('BO', 'AK', 'SI'); gli altri blocchi sono ignorati
+#   hole_tokens:       numero di token di una riga foro (faccia x y diametro [profondità])
+#   hole_type_token:   indice del token con il tipo/profondità del foro (None = 'normal')
+#   face_on_every_line: le righe di contenuto iniziano sempre con la faccia
+#   contour_continuation: nei contorni la faccia è solo sulla prima riga del blocco
+#   contour_min_tokens: token minimi di una riga di contorno
+#   partial_on_error:  in caso di errore restituisce la parte letta fin lì invece di None
+FORMAT_SCHEMAS = {
+    'NC': {
+        'extensions': ('.nc',),
+        'header': HEADER_SCHEMAS['NC'],
+        'sections': {'BO': 'BO', 'AK': 'AK', 'IK': 'AK', 'SI': 'SI'},
+        'hole_tokens': (5,),
+        'hole_type_token': 4,
+        'face_on_every_line': True,
+        'contour_continuation': False,
+        'contour_min_tokens': 4,
+        'partial_on_error': False,
+    },
+    'NC1': {
+        'extensions': ('.nc1',),
+        'header': HEADER_SCHEMAS['NC1'],
+        'sections': {'BO': 'BO', 'AK': 'AK', 'IK': 'AK', 'SI': 'SI'},
+        'hole_tokens': (4,),
+        'hole_type_token': None,
+        'face_on_every_line': False,
+        'contour_continuation': True,
+        'contour_min_tokens': 4,
+        'partial_on_error': True,
+    },
+}
+
 
 if __name__ == "__main__":
     profile_type = 'U'     # ad esempio 'I', 'U', 'L', ecc.
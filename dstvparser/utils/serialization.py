@@ -0,0 +1,58 @@
+from dataclasses import asdict
+
+from dstvparser.models.nc_part import Hole, NCPart, Notch, Slot
+
+OUTPUT_MODES = ('header', 'summary', 'full')
+
+
+def part_to_dict(part: NCPart, mode: str = 'summary') -> dict:
+    """
+    Converte una parte in un dizionario serializzabile in JSON.
+
+    Args:
+        part: parte parsata
+        mode: 'header' (solo intestazione), 'summary' (intestazione, dimensioni,
+              conteggi e lavorazioni rilevate) oppure 'full' (anche la geometria)
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Modalità non supportata: {mode}")
+    data = part.get_header()
+    if mode == 'header':
+        return data
+
+    data['dimensions'] = dict(part.dimensions)
+    data['features'] = part.get_features_summary()
+    data['has_holes'] = part.has_holes()
+    data['has_slots'] = part.has_slots()
+    data['has_worked_areas'] = part.has_worked_areas()
+    data['flange_skew_cut'] = part.flange_skew_cut()
+    data['web_skew_cut'] = part.web_skew_cut()
+    if mode == 'summary':
+        return data
+
+    data['holes'] = [asdict(hole) for hole in part.holes]
+    data['slots'] = [asdict(slot) for slot in part.slots]
+    data['notches'] = [asdict(notch) for notch in part.notches]
+    for face in ('o', 'u', 'v', 'h'):
+        data[f'{face}_contour'] = [list(point) for point in getattr(part, f'{face}_contour')]
+    return data
+
+
+def part_from_dict(data: dict) -> NCPart:
+    """Ricostruisce una parte da un dizionario di part_to_dict in modalità 'full'"""
+    part = NCPart(
+        order_id=data['order_id'],
+        piece_id=data['piece_id'],
+        material=data['material'],
+        quantity=data['quantity'],
+        profile_type=data['profile_type'],
+        code_profile=data['code_profile'],
+        length=data['lenght'],
+        dimensions=dict(data.get('dimensions', {})),
+    )
+    part.holes = [Hole(**hole) for hole in data.get('holes', [])]
+    part.slots = [Slot(**slot) for slot in data.get('slots', [])]
+    part.notches = [Notch(**notch) for notch in data.get('notches', [])]
+    for face in ('o', 'u', 'v', 'h'):
+        part.add_contour_points(face, [tuple(point) for point in data.get(f'{face}_contour', [])])
+    return part
@@ -0,0 +1,330 @@
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.utils.profile_schemas import BLOCK_CODES, HEADER_SCHEMAS, PROFILE_SCHEMAS
+
+FACES = ('o', 'u', 'v', 'h')
+CONTOUR_BLOCKS = ('AK', 'IK')
+NC1_CONTOUR_COLUMNS = 7   # i contorni NC1 hanno sempre 7 colonne numeriche
+TOKEN = re.compile(r'\S+')
+NUMBER = re.compile(r'^([-+]?\d*\.?\d+)([a-zA-Z]*)$')
+
+
+def file_type_for(path: Union[str, Path]) -> str:
+    """'NC' o 'NC1' in base all'estensione"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.nc':
+        return 'NC'
+    if suffix == '.nc1':
+        return 'NC1'
+    raise ValueError(f"Formato file non supportato: {path}")
+
+
+def format_header_line(value) -> str:
+    """Riga dell'header come la scrivono i CAD: decimali allineati a destra su 11 colonne, testi e interi rientrati di 2"""
+    if isinstance(value, float):
+        return f"{value:11.2f}"
+    text = str(value).strip()
+    return f"{text:>11}" if NUMBER.match(text) and '.' in text else f"  {text}"
+
+
+def format_record(face: Optional[str], tokens: Sequence[str], columns: bool = False) -> str:
+    """
+    Riga di contenuto di un blocco (BO, AK, IK, SI...).
+
+    Layout NC (default): faccia su ogni riga, x su 9 colonne (suffisso compreso),
+    y su 8, il resto su 6. Layout a colonne dei contorni NC1 (`columns=True`):
+    faccia solo sulla prima riga del blocco (face=None per le successive),
+    colonne da 11 con il suffisso della x che occupa la prima colonna della y.
+    """
+    if not columns:
+        return f"  {face} " + ' '.join(token.rjust(9 if i == 0 else 8 if i == 1 else 6)
+                                       for i, token in enumerate(tokens))
+    out = f"  {face}" if face else '   '
+    carry = 0
+    for token in tokens:
+        number = NUMBER.match(token)
+        digits, suffix = number.groups() if number else (token, '')
+        out += digits.rjust(11 - carry) + suffix
+        carry = len(suffix)
+    return out
+
+
+def _number(value: float) -> str:
+    return f"{value:.2f}"
+
+
+def build_header(part: NCPart, file_type: str, template: Optional[List[str]] = None) -> List[str]:
+    """
+    Righe dell'header (senza 'ST' e senza a capo) nel layout NC o NC1.
+
+    I campi letti dai parser (HEADER_SCHEMAS) e le dimensioni (PROFILE_SCHEMAS)
+    vengono dalla parte; le altre righe (pesi, angoli, testi) da `template`
+    se indicato (valori dello stesso layout), altrimenti da valori neutri.
+    """
+    schema = HEADER_SCHEMAS[file_type]
+    size = schema['size']
+    lines = [format_header_line(0.0)] * size
+    if template is not None:
+        lines[:len(template[:size])] = [format_header_line(v) for v in template[:size]]
+    elif file_type == 'NC':
+        lines[1] = lines[2] = format_header_line(part.piece_id)    # disegno e fase
+        lines[size - schema['text_lines']:] = [format_header_line('-')] * schema['text_lines']
+    else:
+        lines[4] = format_header_line(part.piece_id)
+        lines[6] = format_header_line(part.quantity)
+    if 'comment_line' in schema:
+        lines[schema['comment_line']] = f"** {part.piece_id}.{file_type.lower()}"
+
+    for name, idx in schema['fields'].items():
+        value = getattr(part, name)
+        lines[idx] = format_header_line(float(value) if name == 'length' else value)
+
+    profile_schema = PROFILE_SCHEMAS.get(part.profile_type, {})
+    for name, idx in zip(profile_schema.get('fields', []), profile_schema.get('indices', {}).get(file_type, [])):
+        if name in part.dimensions:
+            lines[idx] = format_header_line(float(part.dimensions[name]))
+
+    if file_type == 'NC1':
+        lines += [''] * schema['text_lines']   # testi liberi vuoti, come nei file NC1
+    return lines
+
+
+def _raw_loops(points: List[Tuple[float, float, float]], tolerance: float = 1e-3) -> List[List[Tuple[float, float, float]]]:
+    """
+    Come split_contour_loops ma conserva il raggio di ogni punto e non chiude
+    gli anelli aperti: i punti vengono riscritti così come sono stati letti.
+    """
+    loops = []
+    current: List[Tuple[float, float, float]] = []
+    for point in points:
+        current.append(point)
+        if len(current) > 2 and abs(point[0] - current[0][0]) <= tolerance and abs(point[1] - current[0][1]) <= tolerance:
+            loops.append(current)
+            current = []
+    if current:
+        loops.append(current)
+    return loops
+
+
+def _contour_blocks(part: NCPart, face: str, file_type: str) -> List[List[str]]:
+    blocks = []
+    for i, loop in enumerate(_raw_loops(getattr(part, f"{face}_contour"))):
+        lines = ['AK' if i == 0 else 'IK']
+        for j, (x, y, radius) in enumerate(loop):
+            if file_type == 'NC':
+                lines.append(format_record(face, (_number(x) + 'u', _number(y), _number(radius))))
+            else:
+                tokens = [_number(x) + ('s' if j == 0 else ''), _number(y), _number(radius)]
+                tokens += [_number(0.0)] * (NC1_CONTOUR_COLUMNS - 3)
+                lines.append(format_record(face if j == 0 else None, tokens, columns=True))
+        blocks.append(lines)
+    return blocks
+
+
+def _bo_block(part: NCPart, face: str, file_type: str) -> Optional[List[str]]:
+    lines = ['BO']
+    for hole in part.holes:
+        if hole.face != face:
+            continue
+        tokens = [_number(hole.x) + 'u', _number(hole.y), _number(hole.diameter)]
+        if file_type == 'NC':
+            depth = hole.Hole_type if isinstance(hole.Hole_type, (int, float)) else hole.depth
+            tokens.append(_number(float(depth)))
+        lines.append(format_record(face, tokens))
+    for slot in part.slots:
+        if slot.face == face:
+            tokens = [_number(slot.x) + 'u', _number(slot.y), _number(slot.diameter), _number(float(slot.hole_type)) + 'l',
+                      _number(slot.cc_distance), _number(slot.height), _number(slot.angle)]
+            lines.append(format_record(face, tokens))
+    return lines if len(lines) > 1 else None
+
+
+def serialize_part(part: NCPart, file_type: str = 'NC', newline: str = '\n') -> str:
+    """
+    Scrive una parte come file DSTV completo nel layout NC o NC1.
+
+    Per ogni faccia vengono scritti i fori/asole (BO) e i contorni (AK, con
+    gli anelli successivi come IK). Le marcature SI non sono presenti in
+    NCPart e non vengono scritte.
+    """
+    if file_type not in HEADER_SCHEMAS:
+        raise ValueError(f"Formato file non supportato: {file_type}")
+    lines = ['ST'] + build_header(part, file_type)
+    for face in FACES:
+        lines += _bo_block(part, face, file_type) or []
+        for block in _contour_blocks(part, face, file_type):
+            lines += block
+    lines.append('EN')
+    return newline.join(lines) + newline
+
+
+def rewrite_tokens(line: str, edits: Dict[int, Callable[[float], float]]) -> str:
+    """
+    Modifica alcuni token numerici di una riga (indice del token -> funzione sul
+    valore) mantenendo l'allineamento a destra delle colonne, il numero di
+    decimali e l'eventuale suffisso (es. '130.02u').
+    """
+    body = line.rstrip('\r\n')
+    out = []
+    last = 0
+    for i, match in enumerate(TOKEN.finditer(body)):
+        gap, token = body[last:match.start()], match.group()
+        number = NUMBER.match(token) if i in edits else None
+        if number is not None:
+            digits, suffix = number.groups()
+            decimals = len(digits.split('.')[1]) if '.' in digits else 0
+            value = edits[i](float(digits))
+            new = f"{value + 0.0:.{decimals}f}{suffix}"
+            if float(new[:len(new) - len(suffix)]) == 0:
+                new = new.lstrip('-')    # niente '-0.00'
+            diff = len(new) - len(token)
+            if diff > 0:
+                gap = gap[:max(1 if gap else 0, len(gap) - diff)]
+            elif diff < 0:
+                gap += ' ' * -diff
+            token = new
+        out.append(gap + token)
+        last = match.end()
+    out.append(line[last:])
+    return ''.join(out)
+
+
+class DSTVBlock:
+    """Blocco DSTV (ST, BO, AK, IK, SI, EN...) conservato come righe grezze"""
+    __slots__ = ('code', 'lines')
+
+    def __init__(self, code: str, lines: List[str]):
+        self.code = code      # '' per eventuali righe prima di ST
+        self.lines = lines    # righe originali con il loro a capo, compresa la riga del codice
+
+    def records(self) -> List[int]:
+        """Indici delle righe di contenuto non vuote (esclusa la riga del codice)"""
+        start = 1 if self.code else 0
+        return [i for i in range(start, len(self.lines)) if self.lines[i].strip()]
+
+    def face(self) -> Optional[str]:
+        """Faccia del blocco, dalla prima riga di contenuto"""
+        for i in self.records():
+            token = self.lines[i].split()[0]
+            if token in FACES:
+                return token
+        return None
+
+
+class DSTVDocument:
+    """
+    File DSTV come sequenza di blocchi grezzi.
+
+    Le trasformazioni modificano solo le righe o i blocchi che le riguardano:
+    tutto il resto viene riscritto byte per byte. Il contenuto è decodificato
+    in latin-1, che è reversibile per qualunque byte.
+    """
+    def __init__(self, blocks: List[DSTVBlock], file_type: str, encoding: str = 'latin-1'):
+        self.blocks = blocks
+        self.file_type = file_type
+        self.encoding = encoding
+
+    @classmethod
+    def from_bytes(cls, data: bytes, file_type: str, encoding: str = 'latin-1') -> 'DSTVDocument':
+        # Come nei parser: dentro l'header un codice di blocco vale solo dopo i campi
+        # obbligatori, così una marca o un profilo di due lettere (E1, RO...) resta un valore
+        fields = HEADER_SCHEMAS.get(file_type, {}).get('fields', {})
+        header_fields = max(fields.values()) + 1 if fields else 0
+        blocks: List[DSTVBlock] = []
+        current = DSTVBlock('', [])
+        header_records = 0
+        for line in data.decode(encoding).splitlines(keepends=True):
+            stripped = line.strip()
+            if (stripped in BLOCK_CODES and (stripped != 'ST' or not blocks and not current.code)
+                    and (current.code != 'ST' or header_records >= header_fields)):
+                if current.lines:
+                    blocks.append(current)
+                current = DSTVBlock(stripped, [line])
+                header_records = 0
+            else:
+                current.lines.append(line)
+                if stripped:
+                    header_records += 1
+        if current.lines:
+            blocks.append(current)
+        return cls(blocks, file_type, encoding)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], encoding: str = 'latin-1') -> 'DSTVDocument':
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read(), file_type_for(path), encoding)
+
+    def to_bytes(self) -> bytes:
+        return ''.join(self.iter_lines()).encode(self.encoding, errors='replace')
+
+    def iter_lines(self):
+        for block in self.blocks:
+            yield from block.lines
+
+    def newline(self) -> str:
+        """A capo usato dal file ('\\n' se non ce ne sono)"""
+        for line in self.iter_lines():
+            body = line.rstrip('\r\n')
+            if len(body) < len(line):
+                return line[len(body):]
+        return '\n'
+
+    def header_block(self) -> DSTVBlock:
+        for block in self.blocks:
+            if block.code == 'ST':
+                return block
+            if block.code:
+                break
+        raise ValueError("Header ST non trovato")
+
+    def header_values(self) -> List[str]:
+        """Righe non vuote dell'header senza spazi (come le vedono i parser)"""
+        block = self.header_block()
+        return [block.lines[i].strip() for i in block.records()]
+
+    def get_header_value(self, name: str) -> str:
+        idx = HEADER_SCHEMAS[self.file_type]['fields'][name]
+        return self.header_values()[idx]
+
+    def set_header_value(self, name: str, value) -> bool:
+        """
+        Riscrive solo la riga del campo mantenendone rientro e a capo; i numeri
+        decimali restano allineati con lo stesso numero di decimali.
+        Restituisce True se la riga è cambiata.
+        """
+        block = self.header_block()
+        pos = block.records()[HEADER_SCHEMAS[self.file_type]['fields'][name]]
+        line = block.lines[pos]
+        body = line.rstrip('\r\n')
+        current = body.strip()
+        if '.' in current and NUMBER.match(current) and isinstance(value, (int, float)):
+            new = rewrite_tokens(line, {0: lambda _: float(value)})
+        else:
+            indent = body[:len(body) - len(body.lstrip())]
+            new = f"{indent}{value}{line[len(body):]}"
+        block.lines[pos] = new
+        return new != line
+
+    def remove_blocks(self, code: str) -> int:
+        """Elimina tutti i blocchi con il codice indicato; restituisce quanti"""
+        before = len(self.blocks)
+        self.blocks = [b for b in self.blocks if b.code != code]
+        return before - len(self.blocks)
+
+    def to_part(self) -> Optional[NCPart]:
+        """Parsa il documento (così come è ora) con il parser del suo layout"""
+        from dstvparser.parsers.nc1_file_parser import NC1FileParser
+        from dstvparser.parsers.nc_file_parser import NCFileParser
+        parser = NCFileParser('<document>') if self.file_type == 'NC' else NC1FileParser('<document>')
+        return parser.parse_bytes(self.to_bytes())
+
+
+def write_part(part: NCPart, path: Union[str, Path], newline: str = '\n', encoding: str = 'latin-1') -> Path:
+    """Scrive una parte nel layout dato dall'estensione di `path` (.nc o .nc1)"""
+    path = Path(path)
+    with open(path, 'w', encoding=encoding, errors='replace', newline='') as file:
+        file.write(serialize_part(part, file_type_for(path), newline))
+    return path
@@ -0,0 +1,286 @@
+import math
+import os
+import tempfile
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+from dstvparser.utils.profile_schemas import HEADER_SCHEMAS, PROFILE_VALUES
+from dstvparser.writers.dstv_writer import (CONTOUR_BLOCKS, FACES, NC1_CONTOUR_COLUMNS, NUMBER, DSTVBlock,
+                                            DSTVDocument, build_header, format_record, rewrite_tokens)
+
+
+@dataclass
+class TransformResult:
+    """Esito della trasformazione di un file"""
+    source: str
+    target: Optional[str]
+    changed: bool = False
+    error: Optional[str] = None
+
+
+class Transform:
+    """
+    Trasformazione di un DSTVDocument. `apply` modifica il documento sul posto
+    e restituisce True se ha cambiato qualcosa. Le sottoclassi devono essere
+    picklable (vengono inviate ai processi worker).
+    """
+    suffix: Optional[str] = None   # nuova estensione del file di uscita, se cambia
+
+    def apply(self, doc: DSTVDocument) -> bool:
+        raise NotImplementedError
+
+
+class RenumberPieces(Transform):
+    """
+    Rinumera il piece_id.
+
+    Args:
+        mapping: {piece_id vecchio: nuovo}; i pezzi non presenti restano invariati
+        template: in alternativa, formato con i campi dell'header (es. "A-{piece_id}")
+    """
+    def __init__(self, mapping: Optional[Mapping[str, str]] = None, template: Optional[str] = None):
+        if (mapping is None) == (template is None):
+            raise ValueError("Indicare mapping oppure template")
+        self.mapping = dict(mapping) if mapping is not None else None
+        self.template = template
+
+    def apply(self, doc: DSTVDocument) -> bool:
+        current = doc.get_header_value('piece_id')
+        if self.mapping is not None:
+            new = self.mapping.get(current)
+            if new is None:
+                return False
+        else:
+            fields = {name: doc.get_header_value(name) for name in HEADER_SCHEMAS[doc.file_type]['fields']}
+            new = self.template.format(**fields)
+        return doc.set_header_value('piece_id', new)
+
+
+class OverrideQuantity(Transform):
+    """Imposta la quantità: un valore unico oppure {piece_id: quantità}"""
+    def __init__(self, quantity: Union[int, Mapping[str, int]]):
+        self.quantity = quantity if isinstance(quantity, int) else dict(quantity)
+
+    def apply(self, doc: DSTVDocument) -> bool:
+        if isinstance(self.quantity, int):
+            quantity = self.quantity
+        else:
+            quantity = self.quantity.get(doc.get_header_value('piece_id'))
+            if quantity is None:
+                return False
+        return doc.set_header_value('quantity', int(quantity))
+
+
+class StripMarkings(Transform):
+    """Elimina i blocchi SI (marcature)"""
+    def apply(self, doc: DSTVDocument) -> bool:
+        return doc.remove_blocks('SI') > 0
+
+
+def _x_index(tokens: List[str]) -> int:
+    """Indice del token x: 1 se la riga inizia con la faccia, 0 per le righe di continuazione NC1"""
+    return 1 if tokens and tokens[0] in FACES else 0
+
+
+class MirrorParts(Transform):
+    """
+    Specchia le parti rispetto alla mezzeria della lunghezza (x' = L - x),
+    ottenendo il pezzo opposto.
+
+    Fori, marcature e punti dei contorni cambiano solo la x; nei contorni si
+    inverte il segno del raggio. Un'asola parte dall'altro estremo del suo
+    asse, con altezza e angolo di segno opposto.
+    """
+    def apply(self, doc: DSTVDocument) -> bool:
+        length = float(doc.get_header_value('length').split(',')[0])
+        mirror_x = lambda x: length - x   # noqa: E731
+        changed = False
+        for block in doc.blocks:
+            if block.code not in ('BO', 'SI') + CONTOUR_BLOCKS:
+                continue
+            for i in block.records():
+                line = block.lines[i]
+                tokens = line.split()
+                ix = _x_index(tokens)
+                if len(tokens) < ix + 2 or not NUMBER.match(tokens[ix]):
+                    continue
+                edits = {ix: mirror_x}
+                if block.code in CONTOUR_BLOCKS and len(tokens) > ix + 2:
+                    edits[ix + 2] = lambda r: -r
+                elif block.code == 'BO':
+                    edits.update(self._slot_edits(tokens, length))
+                block.lines[i] = rewrite_tokens(line, edits)
+                changed = changed or block.lines[i] != line
+        return changed
+
+    @staticmethod
+    def _slot_edits(tokens: List[str], length: float) -> dict:
+        """Modifiche per una riga di asola (token con suffisso 'l'); vuoto per i fori"""
+        pos = next((i for i, t in enumerate(tokens[4:], 4) if t.endswith('l')), None)
+        if pos is None or len(tokens) < pos + 3:
+            return {}
+        values = [float(NUMBER.match(t).group(1)) if NUMBER.match(t) else 0.0 for t in tokens]
+        x, cc, height = values[1], values[pos + 1], values[pos + 2]
+        angle = values[pos + 3] if len(tokens) > pos + 3 else 0.0
+        a = math.radians(angle)
+        ox = cc * math.cos(a) - height * math.sin(a)
+        oy = cc * math.sin(a) + height * math.cos(a)
+        edits = {1: lambda _: length - x - ox, 2: lambda y: y + oy, pos + 2: lambda h: -h}
+        if len(tokens) > pos + 3:
+            edits[pos + 3] = lambda v: -v
+        return edits
+
+
+class ConvertLayout(Transform):
+    """
+    Converte l'header e i blocchi nel layout di un altro formato ('NC' o 'NC1').
+
+    L'header viene ricostruito con build_header: i campi letti dai parser
+    restano gli stessi; disegno, fase e valori del profilo sono riportati
+    dall'header di origine secondo HEADER_SCHEMAS[...]['lines'] (le posizioni
+    differiscono tra i due layout, es. la quantità è la riga 3 in NC1 e 5 in NC).
+    Le righe dei contorni passano dal formato NC (faccia su ogni riga) a quello
+    a colonne NC1 e viceversa; i fori NC1 ricevono/perdono la colonna di profondità.
+    """
+    def __init__(self, target: str = 'NC'):
+        if target not in HEADER_SCHEMAS:
+            raise ValueError(f"Formato file non supportato: {target}")
+        self.target = target
+        self.suffix = f".{target.lower()}"
+
+    def apply(self, doc: DSTVDocument) -> bool:
+        if doc.file_type == self.target:
+            return False
+        part = doc.to_part()
+        if part is None:
+            raise ValueError("Header non parsabile")
+        newline = doc.newline()
+        header = doc.header_block()
+        template = self._header_template(doc.header_values(), doc.file_type)
+        header.lines = [header.lines[0]] + [line + newline for line in build_header(part, self.target, template)]
+
+        for block in doc.blocks:
+            if block.code == 'BO' or block.code == 'SI' or block.code in CONTOUR_BLOCKS:
+                self._convert_block(block, newline)
+        doc.file_type = self.target
+        return True
+
+    def _header_template(self, values: List[str], source: str) -> List[str]:
+        """Righe dell'header di destinazione che non sono campi letti dai parser, prese da quello di origine"""
+        source_lines, target = HEADER_SCHEMAS[source]['lines'], HEADER_SCHEMAS[self.target]
+        template = ['0.00'] * target['size']
+        if self.target == 'NC':   # testi liberi: '-' se vuoti
+            template[target['size'] - target['text_lines']:] = ['-'] * target['text_lines']
+        pairs = [(source_lines[name], target['lines'][name]) for name in ('drawing', 'phase')]
+        pairs += [(source_lines['profile_values'] + k, target['lines']['profile_values'] + k)
+                  for k in range(PROFILE_VALUES)]
+        for src, dst in pairs:
+            if src < len(values) and dst < len(template):
+                template[dst] = values[src]
+        return template
+
+    def _convert_block(self, block: DSTVBlock, newline: str):
+        face = block.face()
+        first = True
+        for i in block.records():
+            tokens = block.lines[i].split()
+            if tokens[0] in FACES:
+                face, tokens = tokens[0], tokens[1:]
+            if block.code in CONTOUR_BLOCKS:
+                if self.target == 'NC1':
+                    tokens = tokens + ['0.00'] * (NC1_CONTOUR_COLUMNS - len(tokens))
+                    line = format_record(face if first else None, tokens, columns=True)
+                else:
+                    line = format_record(face, tokens)
+            elif block.code == 'BO' and not any(t.endswith('l') for t in tokens):
+                tokens = tokens[:3] if self.target == 'NC1' else tokens + ['0.00'] * (4 - len(tokens))
+                line = format_record(face, tokens)
+            else:
+                line = format_record(face, tokens)
+            block.lines[i] = line + newline
+            first = False
+
+
+def _target_path(source: Path, output_dir: Path, root: Optional[Path], suffix: Optional[str]) -> Path:
+    relative = source.relative_to(root) if root is not None else Path(source.name)
+    target = output_dir / relative
+    return target.with_suffix(suffix) if suffix else target
+
+
+def transform_file(source: Union[str, Path], target: Union[str, Path], transforms: Sequence[Transform],
+                   encoding: str = 'latin-1') -> TransformResult:
+    """
+    Legge un file, applica le trasformazioni in ordine e scrive il risultato
+    (scrittura atomica). I blocchi non toccati sono copiati byte per byte.
+    """
+    source, target = str(source), str(target)
+    try:
+        doc = DSTVDocument.from_file(source, encoding)
+        changed = False
+        for transform in transforms:
+            changed = transform.apply(doc) or changed
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(doc.to_bytes())
+        os.replace(tmp, target)
+        return TransformResult(source, target, changed)
+    except Exception as e:
+        return TransformResult(source, None, False, f"{type(e).__name__}: {e}")
+
+
+def _transform_task(args) -> TransformResult:
+    return transform_file(*args)
+
+
+class TransformPipeline:
+    """
+    Pipeline lettura -> trasformazioni -> scrittura su un'intera commessa.
+
+    I file vengono elaborati in streaming: al massimo `max_in_flight` file
+    sono in lavorazione contemporaneamente e i risultati sono restituiti
+    (nell'ordine di ingresso) man mano che sono pronti, quindi la commessa
+    non viene mai caricata tutta in memoria.
+
+    Esempio:
+        pipeline = TransformPipeline([RenumberPieces(template="B-{piece_id}"), StripMarkings()], "out")
+        for result in pipeline.run(iter_dstv_files("job")):
+            ...
+    """
+    def __init__(self, transforms: Sequence[Transform], output_dir: Union[str, Path],
+                 root: Optional[Union[str, Path]] = None, encoding: str = 'latin-1'):
+        self.transforms = list(transforms)
+        self.output_dir = Path(output_dir)
+        self.root = Path(root) if root is not None else None   # per mantenere le sottocartelle
+        self.encoding = encoding
+        self.suffix = next((t.suffix for t in reversed(self.transforms) if t.suffix), None)
+
+    def _tasks(self, paths: Iterable[Union[str, Path]]) -> Iterator[tuple]:
+        for path in paths:
+            path = Path(path)
+            target = _target_path(path, self.output_dir, self.root, self.suffix)
+            if target.resolve() == path.resolve():
+                raise ValueError(f"Il file di uscita coincide con il sorgente: {path}")
+            yield str(path), str(target), self.transforms, self.encoding
+
+    def run(self, paths: Iterable[Union[str, Path]], max_workers: Optional[int] = None,
+            max_in_flight: Optional[int] = None) -> Iterator[TransformResult]:
+        tasks = self._tasks(paths)
+        if max_workers == 1:
+            yield from map(_transform_task, tasks)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = max_workers or os.cpu_count() or 1
+        window = max_in_flight or workers * 4
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for task in tasks:
+                pending.append(executor.submit(_transform_task, task))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
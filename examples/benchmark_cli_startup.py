@@ -0,0 +1,43 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Misura il tempo di avvio di `dstv headers` su un singolo file, confrontato
+# con un interprete vuoto, e i moduli più lenti da importare (-X importtime).
+
+RUNS = 30
+# Equivalente allo script `dstv` installato (senza il costo di runpy di `python -m`)
+ENTRY_POINT = "import sys; from dstvparser.cli import main; sys.exit(main(sys.argv[1:]))"
+
+
+def timed_runs(args):
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(timings), env
+
+
+if __name__ == '__main__':
+    nc_path = str(Path(__file__).parent / "data" / "722.nc")
+
+    baseline, env = timed_runs(['-c', 'pass'])
+    headers, _ = timed_runs(['-c', ENTRY_POINT, 'headers', nc_path])
+    print(f"python -c pass:      {baseline:6.1f} ms (mediana su {RUNS})")
+    print(f"dstv headers 722.nc: {headers:6.1f} ms (+{headers - baseline:.1f} ms)")
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', ENTRY_POINT, 'headers', nc_path],
+                            env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line and 'self' not in line:
+            _, cumulative, name = line.split('|')
+            rows.append((int(cumulative), name.rstrip()))
+    print("\nImport più lenti (cumulativo, us):")
+    for cumulative, name in sorted(rows, reverse=True)[:10]:
+        print(f"{cumulative:>8} {name}")
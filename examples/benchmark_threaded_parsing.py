@@ -0,0 +1,39 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dstvparser.parsers.batch import gil_enabled, iter_dstv_files, parse_files
+
+# Confronta parsing seriale, a thread e a processi sugli stessi file.
+# Sulle build free-threaded (python3.13t con PYTHON_GIL=0) i thread scalano
+# con i core; con il GIL attivo la modalità a thread resta circa seriale.
+
+COPIES = 400
+
+if __name__ == '__main__':
+    data_dir = Path(__file__).parent / "data"
+    workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(COPIES):
+            for source in iter_dstv_files(data_dir):
+                shutil.copy(source, Path(tmp) / f"{i:05d}_{source.name}")
+        files = iter_dstv_files(tmp)
+
+        print(f"Python {sys.version.split()[0]}, GIL attivo: {gil_enabled()}, core: {workers}, file: {len(files)}")
+        timings = {}
+        for label, kwargs in [
+            ('seriale', {'max_workers': 1}),
+            ('thread', {'max_workers': workers, 'use_threads': True}),
+            ('processi', {'max_workers': workers, 'use_threads': False}),
+        ]:
+            start = time.perf_counter()
+            parts = parse_files(files, **kwargs)
+            timings[label] = time.perf_counter() - start
+            assert all(part is not None for part in parts.values())
+            print(f"{label:>9}: {timings[label]:.3f} s  ({len(files) / timings[label]:.0f} file/s)")
+
+        print(f"Speedup thread: {timings['seriale'] / timings['thread']:.2f}x")
@@ -0,0 +1,15 @@
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'examples' / 'data'
+
+
+@pytest.fixture
+def nc_bytes() -> bytes:
+    return (DATA_DIR / '722.nc').read_bytes()
+
+
+@pytest.fixture
+def nc1_bytes() -> bytes:
+    return (DATA_DIR / '2501.nc1').read_bytes()
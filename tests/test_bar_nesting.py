@@ -0,0 +1,69 @@
+import pytest
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.nesting.bar_nesting import BarNester
+
+
+def _bar(piece_id, length, quantity, code_profile='HEA200', material='S355'):
+    return NCPart('C1', piece_id, material, quantity, 'I', code_profile, length)
+
+
+def _placed(result):
+    counts = {}
+    for pattern in result.patterns:
+        for piece_id, _, n in pattern.cuts:
+            counts[piece_id] = counts.get(piece_id, 0) + n * pattern.count
+    return counts
+
+
+def test_first_fit_decreasing():
+    parts = [_bar('A', 4000, 2), _bar('B', 1900, 2), _bar('C', 7000, 1), _bar('D', 13000, 1)]
+    [result] = BarNester(stock_lengths=(6000, 12000), kerf=0).nest(parts)
+    assert _placed(result) == {'A': 2, 'B': 2, 'C': 1}
+    assert result.unplaced == [('D', 13000.0, 1)]
+    # FFD: C+A su una barra da 12000, A+B+B nella seconda
+    assert result.bars_count() == 2
+    assert sorted(p.waste for p in result.patterns for _ in range(p.count)) == [1000.0, 4200.0]
+
+
+def test_kerf_trim_and_downsizing():
+    [result] = BarNester(stock_lengths=(6000, 12000), kerf=5, trim_start=10, trim_end=10).nest([_bar('A', 1990, 3)])
+    [pattern] = result.patterns
+    assert pattern.stock_length == 6000 and pattern.count == 1
+    assert pattern.used_length == pytest.approx(3 * 1990 + 2 * 5 + 20)
+
+
+def test_groups_by_section_and_material():
+    parts = [_bar('A', 1000, 1), _bar('B', 1000, 1, material='S235'), _bar('C', 1000, 1, code_profile='IPE200')]
+    results = BarNester().nest(parts)
+    assert sorted((r.code_profile, r.material) for r in results) == [
+        ('HEA200', 'S235'), ('HEA200', 'S355'), ('IPE200', 'S355')]
+
+
+@pytest.mark.parametrize('length', [0, -50])
+def test_non_positive_length_is_unplaced(length):
+    [result] = BarNester(kerf=0).nest([_bar('Z', length, 3), _bar('A', 1000, 2)])
+    assert result.unplaced == [('Z', float(length), 3)]
+    assert _placed(result) == {'A': 2}
+
+
+def test_improvement_keeps_piece_counts():
+    parts = [_bar(f'P{i}', 700 + 137 * (i % 11), 1 + i % 4) for i in range(40)]
+    nester = BarNester(stock_lengths=(6000, 12000), kerf=3, seed=1)
+    [ffd] = nester.nest(parts)
+    [improved] = nester.nest(parts, time_limit=0.2)
+    expected = {p.piece_id: p.quantity for p in parts}
+    assert _placed(ffd) == expected
+    assert _placed(improved) == expected
+    assert improved.total_stock_length() <= ffd.total_stock_length()
+    for pattern in improved.patterns:
+        assert pattern.used_length <= pattern.stock_length + 1e-6
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        BarNester(stock_lengths=())
+    with pytest.raises(ValueError):
+        BarNester(stock_lengths=(100,), trim_start=60, trim_end=60)
+    with pytest.raises(ValueError):
+        BarNester(kerf=-1)
@@ -0,0 +1,67 @@
+import shutil
+
+import pytest
+
+from conftest import DATA_DIR
+from dstvparser.analysis.clearance import check_job_clearance, check_part_clearance
+from dstvparser.models.nc_part import Hole, NCPart, Slot
+from dstvparser.parsers.batch import parse_file
+
+
+def _plate(holes=(), slots=()):
+    part = NCPart('C1', 'P1', 'S355', 1, 'B', 'PL10', 400.0, {'width': 200.0, 'thickness': 10.0})
+    part.v_contour = [(0.0, 0.0, 0.0), (400.0, 0.0, 0.0), (400.0, 200.0, 0.0), (0.0, 200.0, 0.0), (0.0, 0.0, 0.0)]
+    part.holes = [Hole(x, y, d, 0.0, 'v') for x, y, d in holes]
+    part.slots = [Slot(x, y, d, 0.0, cc, 0.0, 0.0, 0.0, 'v') for x, y, d, cc in slots]
+    return part
+
+
+def _found(violations):
+    return [(v.feature, v.index, v.kind, v.distance) for v in violations]
+
+
+def test_contour_distances():
+    part = _plate(holes=[(100.0, 100.0, 20.0), (5.0, 100.0, 20.0), (500.0, 100.0, 20.0)],
+                  slots=[(340.0, 100.0, 20.0, 50.0)])
+    assert _found(check_part_clearance(part)) == [
+        ('hole', 1, 'intersects', -5.0), ('hole', 2, 'outside', -110.0)]
+    assert _found(check_part_clearance(part, min_contour_clearance=95.0)) == [
+        ('hole', 0, 'too_close', 90.0), ('hole', 1, 'intersects', -5.0), ('hole', 2, 'outside', -110.0),
+        ('slot', 0, 'too_close', 0.0)]
+
+
+def test_inner_contour_is_a_hole():
+    part = _plate(holes=[(200.0, 100.0, 10.0)])
+    part.v_contour += [(150.0, 50.0, 0.0), (250.0, 50.0, 0.0), (250.0, 150.0, 0.0), (150.0, 150.0, 0.0),
+                       (150.0, 50.0, 0.0)]
+    assert _found(check_part_clearance(part)) == [('hole', 0, 'outside', -55.0)]
+
+
+def test_face_edge_distances():
+    part = NCPart('C1', 'B1', 'S355', 1, 'I', 'HEA200', 1000.0,
+                  {'profile_height': 200.0, 'flange_thickness': 10.0, 'flange_width': 200.0})
+    part.holes = [Hole(100.0, 20.0, 22.0, 0.0, 'v'), Hole(5.0, 100.0, 20.0, 0.0, 'v'),
+                  Hole(500.0, 100.0, 22.0, 0.0, 'v'), Hole(500.0, 185.0, 22.0, 0.0, 'o')]
+    assert _found(check_part_clearance(part)) == [('hole', 0, 'edge', -1.0), ('hole', 1, 'edge', -5.0)]
+    assert _found(check_part_clearance(part, min_edge_clearance=5.0)) == [
+        ('hole', 0, 'edge', -1.0), ('hole', 1, 'edge', -5.0), ('hole', 3, 'edge', 4.0)]
+
+
+def test_job_reports_unparsable_files(tmp_path):
+    shutil.copy(DATA_DIR / '722.nc', tmp_path / 'a.nc')
+    (tmp_path / 'bad.nc').write_text('non DSTV\n')
+    (tmp_path / 'notes.txt').write_text('x')
+    paths = [tmp_path / 'a.nc', tmp_path / 'bad.nc', tmp_path / 'notes.txt']
+    results = check_job_clearance(paths, max_workers=1)
+    for name in ('bad.nc', 'notes.txt'):
+        assert [v.kind for v in results[str(tmp_path / name)]] == ['unparsable']
+    assert all(v.kind != 'unparsable' for v in results.get(str(tmp_path / 'a.nc'), []))
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_job_matches_part_check(max_workers):
+    path = DATA_DIR / '722.nc'
+    expected = check_part_clearance(parse_file(path), min_contour_clearance=50.0, min_edge_clearance=50.0)
+    results = check_job_clearance([path, path.with_suffix('.dxf')], 50.0, 50.0, max_workers=max_workers)
+    assert results.get(str(path), []) == expected
+    assert results[str(path.with_suffix('.dxf'))][0].kind == 'unparsable'
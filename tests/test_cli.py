@@ -0,0 +1,49 @@
+import json
+
+from conftest import DATA_DIR
+from dstvparser.cli import class_folder, main
+
+NC_PATH = str(DATA_DIR / '722.nc')
+NC1_PATH = str(DATA_DIR / '2501.nc1')
+
+
+def test_headers_single_file(capsys):
+    assert main(['headers', NC_PATH]) == 0
+    records = json.loads(capsys.readouterr().out)
+    assert [r['piece_id'] for r in records] == ['722']
+
+
+def test_unsupported_extension_is_a_failed_parse(tmp_path, capsys):
+    path = tmp_path / 'notes.txt'
+    path.write_text('ST\n')
+    assert main(['headers', str(path)]) == 1
+    captured = capsys.readouterr()
+    assert json.loads(captured.out) == []
+    assert 'notes.txt' in captured.err
+
+
+def test_unsupported_extension_among_others(tmp_path, capsys):
+    path = tmp_path / 'notes.txt'
+    path.write_text('ST\n')
+    assert main(['headers', NC_PATH, str(path), NC1_PATH, '-j', '1', '-f', 'jsonl']) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['file'] for line in lines] == [NC_PATH, NC1_PATH]
+
+
+def test_class_folder():
+    assert class_folder('HEA 200/B') == 'HEA 200_B'
+    assert class_folder('  ') == class_folder('..') == '_senza_classe'
+
+
+def test_classify_copy_to_stays_inside_target(tmp_path, capsys):
+    lines = (DATA_DIR / '722.nc').read_bytes().split(b'\n')
+    start = next(i for i, line in enumerate(lines) if line.strip() == b'ST')
+    lines[start + 5] = b'  ..'        # materiale
+    source = tmp_path / 'in' / 'odd.nc'
+    source.parent.mkdir()
+    source.write_bytes(b'\n'.join(lines))
+    target = tmp_path / 'out'
+    assert main(['classify', str(source), NC_PATH, '--by', 'material', '--copy-to', str(target), '-j', '1']) == 0
+    capsys.readouterr()
+    assert sorted(str(p.relative_to(target)) for p in target.rglob('*.nc')) == ['S275JR/722.nc', '_senza_classe/odd.nc']
+    assert not (tmp_path / 'odd.nc').exists()
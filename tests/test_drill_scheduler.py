@@ -0,0 +1,60 @@
+import pytest
+
+from dstvparser.models.nc_part import Hole, NCPart
+from dstvparser.scheduling.drill_scheduler import DrillLineScheduler, count_tool_changes, part_tools
+
+
+def _part(piece_id, diameters, code_profile='HEA200', face='v'):
+    part = NCPart('C1', piece_id, 'S355', 1, 'I', code_profile, 1000.0)
+    part.holes = [Hole(100.0 * i, 50.0, d, 0.0, face) for i, d in enumerate(diameters)]
+    return part
+
+
+def _set(*diameters, spindle='v'):
+    return frozenset((spindle, float(d)) for d in diameters)
+
+
+def test_part_tools_maps_faces_to_spindles():
+    assert part_tools(_part('A', [22, 22.0001], face='h')) == _set(22)
+    assert part_tools(_part('A', [18], face='o')) == _set(18, spindle='o')
+
+
+@pytest.mark.parametrize('capacity, expected', [(None, 2), (1, 3), (2, 2)])
+def test_count_tool_changes(capacity, expected):
+    assert count_tool_changes([_set(22), _set(18), _set(22)], capacity) == expected
+
+
+def test_count_tool_changes_keeps_tool_needed_soonest():
+    # Con due posti, al caricamento di 26 va scaricato 18 (non serve più), non 22
+    assert count_tool_changes([_set(22), _set(18), _set(26), _set(22)], 2) == 3
+    # Spindle separati hanno magazzini separati
+    assert count_tool_changes([_set(22), _set(22, spindle='o'), _set(22)], 1) == 2
+
+
+def test_oversized_set_counts_excess_tools():
+    assert count_tool_changes([_set(14, 18, 22)], 2) == 4
+
+
+def test_schedule_groups_sections_and_tool_sets():
+    parts = [_part('A1', [22]), _part('B1', [18], 'IPE200'), _part('A2', [18]), _part('A3', [22]),
+             _part('B2', [22], 'IPE200'), _part('A4', [18]), None]
+    schedule = DrillLineScheduler(magazine_size=1, tool_change_time=10).schedule(parts)
+    ids = [p.piece_id for p in schedule.sequence]
+    assert sorted(ids) == ['A1', 'A2', 'A3', 'A4', 'B1', 'B2']
+    assert schedule.groups == [('HEA200', 4), ('IPE200', 2)]
+    assert ids[:4] in (['A1', 'A3', 'A2', 'A4'], ['A2', 'A4', 'A1', 'A3'])
+    assert schedule.baseline_tool_changes == 4
+    assert schedule.tool_changes == 3
+    assert schedule.time_saved() == 10
+
+
+def test_schedule_prefers_sets_sharing_loaded_tools():
+    parts = [_part('A', [14, 18]), _part('X', [30, 32]), _part('C', [22, 26]), _part('B', [18, 22])]
+    schedule = DrillLineScheduler(magazine_size=2).schedule(parts)
+    assert [p.piece_id for p in schedule.sequence] == ['A', 'B', 'C', 'X']
+    assert (schedule.tool_changes, schedule.baseline_tool_changes) == (6, 7)
+
+
+def test_invalid_magazine_size():
+    with pytest.raises(ValueError):
+        DrillLineScheduler(magazine_size=0)
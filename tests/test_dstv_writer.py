@@ -0,0 +1,92 @@
+import pytest
+
+from conftest import DATA_DIR
+from dstvparser.parsers.batch import parse_file
+from dstvparser.utils.serialization import part_to_dict
+from dstvparser.writers.dstv_writer import DSTVDocument, write_part
+from dstvparser.writers.transform_pipeline import ConvertLayout, MirrorParts, OverrideQuantity, RenumberPieces
+
+SAMPLES = ['722.nc', '2501.nc1']
+
+
+@pytest.mark.parametrize('name', SAMPLES)
+def test_document_round_trip_is_byte_identical(name):
+    data = (DATA_DIR / name).read_bytes()
+    doc = DSTVDocument.from_file(DATA_DIR / name)
+    assert doc.to_bytes() == data
+
+
+@pytest.mark.parametrize('name', SAMPLES)
+def test_document_to_part_matches_parser(name):
+    doc = DSTVDocument.from_file(DATA_DIR / name)
+    assert part_to_dict(doc.to_part(), 'full') == part_to_dict(parse_file(DATA_DIR / name), 'full')
+
+
+def test_set_header_value(nc_bytes):
+    doc = DSTVDocument.from_bytes(nc_bytes, 'NC')
+    assert doc.set_header_value('piece_id', 'B-722')
+    assert doc.get_header_value('piece_id') == 'B-722'
+    assert doc.to_part().piece_id == 'B-722'
+
+
+def test_mirror_twice_restores_file(nc_bytes):
+    doc = DSTVDocument.from_bytes(nc_bytes, 'NC')
+    MirrorParts().apply(doc)
+    assert doc.to_bytes() != nc_bytes
+    MirrorParts().apply(doc)
+    assert doc.to_bytes() == nc_bytes
+
+
+def test_two_letter_piece_id(nc_bytes):
+    data = nc_bytes.replace(b'\n  722\n  722\n', b'\n  E1\n  E1\n', 1)
+    doc = DSTVDocument.from_bytes(data, 'NC')
+    assert doc.to_bytes() == data
+    assert [b.code for b in doc.blocks].count('ST') == 1
+    assert doc.get_header_value('piece_id') == 'E1'
+    assert doc.set_header_value('quantity', 5)
+    assert RenumberPieces(template='B-{piece_id}').apply(doc)
+    assert not OverrideQuantity(5).apply(doc)
+    part = doc.to_part()
+    assert (part.piece_id, part.quantity, len(part.holes)) == ('B-E1', 5, 4)
+
+
+def _contours(part):
+    return {face: getattr(part, f'{face}_contour') for face in ('o', 'u', 'v', 'h')}
+
+
+def test_write_part_round_trip(tmp_path):
+    part = parse_file(DATA_DIR / '722.nc')
+    written = parse_file(write_part(part, tmp_path / '722.nc'))
+    assert written.get_header() == part.get_header()
+    assert written.dimensions == part.dimensions
+    assert part_to_dict(written, 'full')['holes'] == part_to_dict(part, 'full')['holes']
+    assert _contours(written) == _contours(part)
+
+
+@pytest.mark.parametrize('suffix', ['nc', 'nc1'])
+def test_write_part_keeps_contour_radii(tmp_path, suffix):
+    part = parse_file(DATA_DIR / '722.nc')
+    part.v_contour = [(0.0, 0.0, 0.0), (275.6, 0.0, 10.0), (275.6, 100.0, -5.0), (0.0, 100.0, 0.0), (0.0, 0.0, 0.0),
+                      (50.0, 20.0, 0.0), (80.0, 20.0, 0.0), (80.0, 40.0, 0.0)]   # secondo anello aperto
+    written = parse_file(write_part(part, tmp_path / f'part.{suffix}'))
+    assert written.v_contour == part.v_contour
+
+
+def test_convert_layout_maps_header_lines():
+    doc = DSTVDocument.from_file(DATA_DIR / '2501.nc1')
+    original = doc.header_values()
+    assert ConvertLayout('NC').apply(doc)
+    values = doc.header_values()
+    assert (values[1], values[2], values[5]) == ('2501', '14', '3')   # disegno, fase, quantità
+    assert values[9:20] == original[10:21]
+    part = doc.to_part()
+    assert (part.quantity, part.code_profile, part.length) == (3, 'HEA200', 1810.0)
+    assert ConvertLayout('NC1').apply(doc)
+    assert doc.header_values() == original
+
+
+def test_convert_nc_to_nc1(nc_bytes):
+    doc = DSTVDocument.from_bytes(nc_bytes, 'NC')
+    expected = doc.to_part().get_header()
+    assert ConvertLayout('NC1').apply(doc)
+    assert doc.to_part().get_header() == expected
@@ -0,0 +1,61 @@
+import pytest
+
+import dstvparser.parsers.table_parser as table_parser
+from dstvparser.parsers.batch import parse_content, parse_file
+from dstvparser.parsers.factory import NCFileParserFactory
+from dstvparser.render.svg_renderer import SVGThumbnailCache
+from dstvparser.service.http_service import ParseService
+
+PIECE_ID = '722°A'
+
+
+@pytest.fixture
+def cp1252_file(tmp_path, nc_bytes):
+    path = tmp_path / 'part.nc'
+    path.write_bytes(nc_bytes.replace(b'\n  722\n  722\n', b'\n  722\n  722\xb0A\n', 1))
+    return path
+
+
+def test_parse_file(cp1252_file):
+    assert parse_file(cp1252_file).piece_id == PIECE_ID
+
+
+def test_parse_file_mmap(cp1252_file, monkeypatch):
+    monkeypatch.setattr(table_parser, 'MMAP_THRESHOLD', 0)
+    part = parse_file(cp1252_file)
+    assert part.piece_id == PIECE_ID
+    assert len(part.holes) == 4
+
+
+def test_parse_content_bytes(cp1252_file):
+    assert parse_content(cp1252_file.read_bytes(), 'part.nc').piece_id == PIECE_ID
+
+
+def test_parse_content_text(cp1252_file):
+    assert parse_content(cp1252_file.read_bytes().decode('cp1252'), 'part.nc').piece_id == PIECE_ID
+
+
+def test_utf8_and_bom(tmp_path, cp1252_file):
+    utf8 = cp1252_file.read_bytes().replace(b'\xb0', '°'.encode('utf-8'))
+    assert parse_content(utf8, 'part.nc').piece_id == PIECE_ID
+    assert parse_content(b'\xef\xbb\xbf' + utf8, 'part.nc').piece_id == PIECE_ID
+
+
+def test_explicit_encoding(cp1252_file):
+    assert NCFileParserFactory.create_parser(str(cp1252_file), 'latin-1').parse().piece_id == PIECE_ID
+
+
+def test_http_service(cp1252_file):
+    service = ParseService(port=0, workers=1)
+    try:
+        result, cached = service.process_item({'path': str(cp1252_file)}, 'header')
+    finally:
+        service.stop()
+    assert result['piece_id'] == PIECE_ID
+    assert not cached
+
+
+def test_svg_title(tmp_path, cp1252_file):
+    svg_path, hit = SVGThumbnailCache(tmp_path / 'cache').render_file(cp1252_file)
+    assert not hit
+    assert f'<title>{PIECE_ID} HEB100</title>' in svg_path.read_text(encoding='utf-8')
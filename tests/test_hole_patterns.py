@@ -0,0 +1,63 @@
+import pytest
+
+from dstvparser.analysis.hole_patterns import PatternIndex, gauge_lines, recognize_patterns
+from dstvparser.models.nc_part import Hole, NCPart
+
+
+def _part(piece_id, holes):
+    part = NCPart('C1', piece_id, 'S355', 1, 'I', 'HEA200', 1000.0)
+    part.holes = [Hole(x, y, d, 0.0, face) for x, y, d, face in holes]
+    return part
+
+
+def _grid(x0, pitch, gauges=(40.0, 160.0), diameter=22.0, face='v'):
+    return [(x0 + i * pitch, y, diameter, face) for i in range(4) for y in gauges]
+
+
+def test_grid_row_and_single():
+    holes = _grid(100.0, 70.0) + [(600.0 + i * 80.0, 50.0, 18.0, 'o') for i in range(3)] + [(900.0, 100.0, 26.0, 'v')]
+    patterns = recognize_patterns(_part('A', holes))
+    assert [p.signature for p in patterns] == [
+        'row:o:d18:3x1:p80x-:g50',
+        'grid:v:d22:4x2:p70x120:g40,160',
+        'single:v:d26:1x1:p-x-:g100',
+    ]
+    assert patterns[1].holes == list(range(8))
+
+
+def test_signature_stable_within_tolerance():
+    signatures = {recognize_patterns(_part(str(pitch), _grid(100.0, pitch, (40.2, 160.1))))[0].signature
+                  for pitch in (69.6, 70.0, 70.2, 70.3, 70.4)}
+    assert signatures == {'grid:v:d22:4x2:p70x120:g40,160'}
+
+
+def test_irregular_signature_is_translation_invariant():
+    shape = [(0.0, 0.0), (50.0, 0.0), (20.0, 90.0)]
+    a = recognize_patterns(_part('A', [(100 + x, 30 + y, 22.0, 'v') for x, y in shape]), include_gauges=False)
+    b = recognize_patterns(_part('B', [(700 + x, 60 + y, 22.0, 'v') for x, y in shape]), include_gauges=False)
+    assert a[0].kind == 'irregular'
+    assert a[0].signature == b[0].signature
+
+
+def test_max_gap_splits_groups_and_must_be_positive():
+    holes = [(100.0, 50.0, 22.0, 'v'), (200.0, 50.0, 22.0, 'v'), (500.0, 50.0, 22.0, 'v')]
+    assert [p.kind for p in recognize_patterns(_part('A', holes), max_gap=150)] == ['row', 'single']
+    with pytest.raises(ValueError):
+        recognize_patterns(_part('A', holes), max_gap=0)
+
+
+def test_gauge_lines():
+    holes = [(100.0, 40.0, 22.0, 'v'), (200.0, 40.3, 22.0, 'v'), (300.0, 160.0, 22.0, 'v')]
+    assert gauge_lines(_part('A', holes)) == {'v': [(40.0, 2)]}
+
+
+def test_pattern_index():
+    index = PatternIndex.from_patterns({
+        'a.nc': recognize_patterns(_part('A', _grid(100.0, 70.0))),
+        'b.nc': recognize_patterns(_part('B', _grid(500.0, 70.2))),
+        'c.nc': recognize_patterns(_part('C', _grid(100.0, 90.0))),
+    })
+    assert index.shared() == {'grid:v:d22:4x2:p70x120:g40,160': ['a.nc', 'b.nc']}
+    assert index.similar_parts('a.nc') == {'b.nc': 1}
+    index.remove('b.nc')
+    assert index.shared() == {}
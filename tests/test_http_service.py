@@ -0,0 +1,87 @@
+import http.client
+import json
+
+import pytest
+
+from conftest import DATA_DIR
+from dstvparser.service.http_service import ParseService
+
+NC_PATH = DATA_DIR / '722.nc'
+
+
+@pytest.fixture(params=[1, 2], ids=['thread', 'fork'])
+def service(request):
+    service = ParseService(port=0, workers=request.param)
+    service.start()
+    yield service
+    service.stop()
+
+
+def call(service, method, path, payload=None, headers=None):
+    conn = http.client.HTTPConnection(*service.address, timeout=10)
+    try:
+        body = payload if isinstance(payload, bytes) or payload is None else json.dumps(payload).encode()
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_parse_batch_and_metrics(service, nc1_bytes):
+    status, result = call(service, 'POST', '/parse', {'path': str(NC_PATH), 'mode': 'header'})
+    assert status == 200 and result['code_profile'] == 'HEB100'
+
+    items = [{'content': nc1_bytes.decode('latin-1'), 'filename': 'b.nc1'}, {'path': str(NC_PATH)},
+             {'content': 'non DSTV', 'filename': 'bad.nc'}]
+    status, result = call(service, 'POST', '/parse/batch', {'items': items})
+    assert status == 200
+    assert [('error' in r) for r in result['results']] == [False, False, True]
+
+    status, metrics = call(service, 'GET', '/metrics')
+    assert status == 200
+    assert metrics['workers'] == service.workers
+    assert (metrics['requests'], metrics['items']) == (2, 4)
+    assert metrics['cache_hits'] + metrics['cache_misses'] == 4
+
+
+def test_cache_hit():
+    service = ParseService(port=0, workers=1)
+    service.start()
+    try:
+        first = call(service, 'POST', '/parse', {'path': str(NC_PATH)})
+        second = call(service, 'POST', '/parse', {'content': NC_PATH.read_bytes().decode('latin-1'),
+                                                  'filename': 'copy.nc'})
+        _, metrics = call(service, 'GET', '/metrics')
+    finally:
+        service.stop()
+    assert first == second
+    assert (metrics['cache_hits'], metrics['cache_misses']) == (1, 1)
+
+
+@pytest.mark.parametrize('length', ['-1', 'abc'])
+def test_invalid_content_length(service, length):
+    status, result = call(service, 'POST', '/parse', b'{}', {'Content-Length': length})
+    assert status == 400 and 'Content-Length' in result['error']
+
+
+def test_internal_error_is_json(monkeypatch):
+    service = ParseService(port=0, workers=1)
+    monkeypatch.setattr(service, 'process_item', lambda item, mode: 1 / 0)
+    service.start()
+    try:
+        status, result = call(service, 'POST', '/parse', {'path': str(NC_PATH)})
+    finally:
+        service.stop()
+    assert status == 500 and 'ZeroDivisionError' in result['error']
+
+
+def test_path_restrictions(tmp_path):
+    secret = tmp_path / 'secret.txt'
+    secret.write_text('x')
+    service = ParseService(port=0, workers=1, root=str(tmp_path))
+    try:
+        assert 'error' in service.process_item({'path': str(secret)}, 'header')[0]
+        assert 'error' in service.process_item({'path': str(NC_PATH)}, 'header')[0]
+    finally:
+        service.stop()
@@ -0,0 +1,58 @@
+from dstvparser.models.nc_part import Hole, NCPart
+from dstvparser.models.part_catalog import PartCatalog
+
+
+def _part(piece_id, code_profile='HEA200', material='S355', length=1000.0, holes=()):
+    part = NCPart('C1', piece_id, material, 1, 'I', code_profile, length)
+    part.holes = [Hole(100.0, 50.0, d, 0.0, face) for face, d in holes]
+    return part
+
+
+def _catalog():
+    return PartCatalog.from_results({
+        'c.nc': _part('C', length=3000.0, holes=[('o', 22.0), ('v', 18.0)]),
+        'a.nc': _part('A', 'IPE200 ', length=1000.0, holes=[('v', 22.0)]),
+        'b.nc': _part('B', material='S235', length=2000.0),
+        'x.nc': None,
+    })
+
+
+def test_query_without_criteria_is_sorted():
+    catalog = _catalog()
+    assert len(catalog) == 3 and 'x.nc' not in catalog
+    assert catalog.query_keys() == ['a.nc', 'b.nc', 'c.nc']
+
+
+def test_header_and_feature_criteria():
+    catalog = _catalog()
+    assert catalog.query_keys(code_profile='IPE200') == ['a.nc']
+    assert catalog.query_keys(material=['S235', 'S355'], has_holes=True) == ['a.nc', 'c.nc']
+    assert catalog.query_keys(has_holes=False) == ['b.nc']
+    assert catalog.query_keys(hole_diameter=22.000001) == ['a.nc', 'c.nc']
+    assert catalog.query_keys(hole_on=('o', 22)) == ['c.nc']
+    assert catalog.query_keys(hole_on=('v', 22), material='S235') == []
+
+
+def test_length_range():
+    catalog = _catalog()
+    assert catalog.query_keys(min_length=1000, max_length=2000) == ['a.nc', 'b.nc']
+    assert catalog.query_keys(min_length=1500) == ['b.nc', 'c.nc']
+    assert catalog.count(max_length=999) == 0
+
+
+def test_facet():
+    catalog = _catalog()
+    assert catalog.facet('material') == {'S355': 2, 'S235': 1}
+    assert catalog.facet('hole_face') == {'o': 1, 'v': 2}
+
+
+def test_remove_and_replace():
+    catalog = _catalog()
+    assert catalog.remove('c.nc').piece_id == 'C'
+    assert catalog.remove('c.nc') is None
+    assert catalog.facet('hole_face') == {'v': 1}
+    assert catalog.query_keys(min_length=1500) == ['b.nc']
+    catalog.add('a.nc', _part('A2', length=5000.0))
+    assert catalog.query_keys(has_holes=True) == []
+    assert catalog.query_keys(min_length=4000) == ['a.nc']
+    assert catalog.get('a.nc').piece_id == 'A2'
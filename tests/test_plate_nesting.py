@@ -0,0 +1,60 @@
+import time
+
+from dstvparser.models.nc_part import NCPart
+from dstvparser.nesting.plate_nesting import PlateNester
+
+
+def _plate(piece_id, thickness=None, quantity=2, length=400.0, width=200.0):
+    dimensions = {'lenght': length, 'width': width}
+    if thickness is not None:
+        dimensions['thickness'] = thickness
+    return NCPart('C1', piece_id, 'S355', quantity, 'B', f'PL{thickness}', length, dimensions)
+
+
+def test_plates_without_thickness_are_not_nested():
+    parts = [_plate('P1', 10.0), _plate('P2', 20.0), _plate('N1'), _plate('N2', 0.0)]
+    results = PlateNester(sheet_sizes=[(3000, 1500)]).nest(parts, max_workers=1)
+    assert sorted(r.thickness for r in results) == [10.0, 20.0]
+    placed = {p.piece_id for r in results for sheet in r.sheets for p in sheet.placements}
+    assert placed == {'P1', 'P2'}
+    assert PlateNester.unnestable(parts) == [('N1', 2), ('N2', 2)]
+
+
+def test_long_plate_uses_the_sheet_size_it_fits():
+    # Il formato più grande per area (2500x2500) non contiene un pezzo lungo 2800
+    parts = [_plate('L1', 10.0, quantity=1, length=2800.0, width=100.0), _plate('S1', 10.0, quantity=1)]
+    nester = PlateNester(sheet_sizes=[(3000, 1500), (2500, 2500)], rotation_step=0)
+    [result] = nester.nest(parts, max_workers=1)
+    assert result.unplaced == []
+    assert [(s.length, s.width) for s in result.sheets] == [(3000, 1500)]
+    assert {p.piece_id for p in result.sheets[0].placements} == {'L1', 'S1'}
+
+
+def test_plate_larger_than_every_sheet_is_unplaced():
+    parts = [_plate('X', 10.0, quantity=3, length=4000.0, width=100.0), _plate('S1', 10.0)]
+    [result] = PlateNester(sheet_sizes=[(3000, 1500), (2500, 2500)]).nest(parts, max_workers=1)
+    assert result.unplaced == [('X', 3)]
+    assert result.sheets_count() == 1
+
+
+def test_placements_do_not_overlap_and_respect_the_budget():
+    parts = [_plate(f'P{i}', 10.0, quantity=3, length=300.0 + 40 * i, width=150.0 + 25 * i) for i in range(12)]
+    nester = PlateNester(sheet_sizes=[(3000, 1500)], spacing=10.0, margin=10.0)
+    start = time.perf_counter()
+    [result] = nester.nest(parts, time_limit=0.3, max_workers=1)
+    assert time.perf_counter() - start < 1.5
+    placed = sum(len(s.placements) * s.count for s in result.sheets)
+    assert placed == 36
+    for sheet in result.sheets:
+        boxes = []
+        for p in sheet.placements:
+            part = parts[int(p.piece_id[1:])]
+            corners = [p.transform(x, y) for x, y in ((0, 0), (part.length, part.dimensions['width']))]
+            xs, ys = sorted(c[0] for c in corners), sorted(c[1] for c in corners)
+            assert xs[0] >= 10.0 - 1e-6 and ys[0] >= 10.0 - 1e-6
+            assert xs[1] <= sheet.length - 10.0 + 1e-6 and ys[1] <= sheet.width - 10.0 + 1e-6
+            boxes.append((xs, ys))
+        for i, (ax, ay) in enumerate(boxes):
+            for bx, by in boxes[i + 1:]:
+                assert ax[1] + 10.0 <= bx[0] + 1e-6 or bx[1] + 10.0 <= ax[0] + 1e-6 or \
+                    ay[1] + 10.0 <= by[0] + 1e-6 or by[1] + 10.0 <= ay[0] + 1e-6
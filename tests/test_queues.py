@@ -0,0 +1,91 @@
+import os
+import time
+
+import pytest
+
+from dstvparser.distributed.queues import FilesystemQueue, SQLiteQueue
+
+
+@pytest.fixture(params=['fs', 'sqlite'])
+def queue(request, tmp_path):
+    if request.param == 'fs':
+        return FilesystemQueue(tmp_path / 'queue', max_attempts=2)
+    return SQLiteQueue(tmp_path / 'queue.db', max_attempts=2)
+
+
+def test_submit_is_idempotent(queue):
+    assert queue.submit(['a', 'b']) == 2
+    assert queue.submit(['a', 'c']) == 1
+    assert queue.progress()['pending'] == 3
+
+
+def test_claim_each_chunk_once(queue):
+    queue.submit(['a', 'b'])
+    claimed = {queue.claim('w1', 60), queue.claim('w2', 60)}
+    assert claimed == {'a', 'b'}
+    assert queue.claim('w3', 60) is None
+    assert queue.progress()['claimed'] == 2
+
+
+def test_complete(queue):
+    queue.submit(['a'])
+    chunk = queue.claim('w1', 60)
+    queue.complete(chunk, 'w1')
+    assert queue.progress()['done'] == 1
+    assert queue.claim('w1', 60) is None
+
+
+def test_active_lease_is_not_requeued(queue):
+    queue.submit(['a'])
+    queue.claim('w1', 60)
+    assert queue.requeue_expired() == 0
+    assert queue.claim('w2', 60) is None
+
+
+def test_expired_lease_is_requeued(queue):
+    queue.submit(['a'])
+    queue.claim('w1', 0.01)
+    time.sleep(0.05)
+    assert queue.requeue_expired() == 1
+    assert queue.claim('w2', 60) == 'a'
+
+
+def test_renew_extends_lease(queue):
+    queue.submit(['a'])
+    queue.claim('w1', 0.01)
+    assert queue.renew('a', 'w1', 60)
+    time.sleep(0.05)
+    assert queue.requeue_expired() == 0
+    assert not queue.renew('a', 'w2', 60)
+
+
+def test_fail_retries_then_gives_up(queue):
+    queue.submit(['a'])
+    queue.fail(queue.claim('w1', 60), 'w1', 'boom')
+    assert queue.progress()['pending'] == 1
+    queue.fail(queue.claim('w1', 60), 'w1', 'boom')
+    assert queue.progress()['failed'] == 1
+    assert queue.claim('w1', 60) is None
+
+
+def test_stale_worker_cannot_fail_a_reclaimed_chunk(queue):
+    queue.submit(['a'])
+    queue.claim('w1', 0.01)
+    time.sleep(0.05)
+    queue.requeue_expired()
+    assert queue.claim('w2', 60) == 'a'
+    queue.fail('a', 'w1', 'lease scaduta')
+    assert queue.progress()['pending'] == 0
+    queue.complete('a', 'w2')
+    assert queue.claim('w3', 60) is None
+    assert queue.progress() == {'pending': 0, 'claimed': 0, 'done': 1, 'failed': 0}
+
+
+def test_fs_claimed_file_never_has_a_past_lease(tmp_path):
+    queue = FilesystemQueue(tmp_path / 'queue')
+    queue.submit(['a'])
+    pending = tmp_path / 'queue' / 'pending' / 'a'
+    os.utime(pending, (0, 0))   # chunk in attesa da molto tempo
+    queue.claim('w1', 60)
+    assert queue.requeue_expired() == 0
+    assert (tmp_path / 'queue' / 'claimed' / 'a@w1').stat().st_mtime > time.time()
@@ -0,0 +1,32 @@
+import pytest
+
+from dstvparser.analysis.revision_diff import match_with_tolerance
+
+
+def _key(value):
+    return 'o', (value,)
+
+
+@pytest.mark.parametrize('old, new', [(0.5, 1.5), (1.5, 2.5), (-0.5, 0.5), (10.0, 11.0)])
+def test_match_at_exact_tolerance(old, new):
+    added, removed = match_with_tolerance([old], [new], _key, tolerance=1.0)
+    assert added == []
+    assert removed == []
+
+
+def test_no_match_beyond_tolerance():
+    added, removed = match_with_tolerance([0.5], [1.75], _key, tolerance=1.0)
+    assert added == [1.75]
+    assert removed == [0.5]
+
+
+def test_exact_key_must_match():
+    added, removed = match_with_tolerance([('o', 0.5)], [('v', 0.5)], lambda item: (item[0], (item[1],)), 1.0)
+    assert added == [('v', 0.5)]
+    assert removed == [('o', 0.5)]
+
+
+def test_two_dimensional_boundary():
+    key = lambda point: ('v', point)
+    added, removed = match_with_tolerance([(0.5, 2.5)], [(1.5, 1.5)], key, tolerance=1.0)
+    assert (added, removed) == ([], [])
@@ -0,0 +1,67 @@
+import shutil
+
+import pytest
+
+from conftest import DATA_DIR
+from dstvparser.distributed.sharded_scan import (ShardManifest, iter_results, job_status, merge_aggregate,
+                                                 merge_catalog, run_worker)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    folder = tmp_path / 'archive'
+    (folder / 'sub').mkdir(parents=True)
+    shutil.copy(DATA_DIR / '722.nc', folder / 'a.nc')
+    shutil.copy(DATA_DIR / '2501.nc1', folder / 'sub' / 'b.nc1')
+    (folder / 'sub' / 'bad.nc').write_text('non DSTV\n')
+    return folder
+
+
+@pytest.mark.parametrize('queue', ['fs', 'sqlite'])
+def test_job_runs_resumes_and_merges(tmp_path, archive, queue):
+    job = tmp_path / 'job'
+    manifest = ShardManifest.build([archive], job, chunk_size=1, mode='full', queue=queue)
+    assert (manifest.config['chunks'], manifest.config['files']) == (3, 3)
+
+    assert run_worker(job, 'w1', max_workers=1, max_chunks=1) == 1
+    assert job_status(job)['done'] == 1
+    assert len(dict(iter_results(job))) == 1
+
+    # Ripresa: un secondo worker completa i chunk rimasti
+    assert run_worker(job, 'w2', max_workers=1) == 2
+    status = job_status(job)
+    assert (status['done'], status['pending'], status['claimed']) == (3, 0, 0)
+    assert run_worker(job, 'w3', max_workers=1) == 0
+
+    groups, failed = merge_aggregate(job)
+    assert failed == ['sub/bad.nc']
+    assert {(g['code_profile'], g['pieces']) for g in groups} == {('HEB100', 1), ('HEA200', 3)}
+    catalog = merge_catalog(job)
+    assert len(catalog) == 2
+    assert catalog.count(code_profile='HEA200') == 1
+
+
+def test_checkpoint_is_not_recomputed(tmp_path, archive):
+    job = tmp_path / 'job'
+    manifest = ShardManifest.build([archive], job, chunk_size=2)
+    queue = manifest.queue()
+    chunk = queue.claim('crashed', 0.0)      # worker fermatosi dopo aver scritto il risultato
+    manifest.result_path(chunk).write_text('{"results": {"a.nc": null}}')
+    assert run_worker(job, 'w1', max_workers=1) == 2
+    assert dict(iter_results(job))['a.nc'] is None
+
+
+def test_rebuild_is_idempotent_or_refused(tmp_path, archive):
+    job = tmp_path / 'job'
+    ShardManifest.build([archive], job, chunk_size=1)
+    run_worker(job, 'w1', max_workers=1, max_chunks=1)
+    ShardManifest.build([archive], job, chunk_size=1)
+    assert job_status(job)['done'] == 1
+
+    shutil.copy(DATA_DIR / '722.nc', archive / '0.nc')
+    with pytest.raises(ValueError):
+        ShardManifest.build([archive], job, chunk_size=1)
+    (archive / '0.nc').unlink()
+    with pytest.raises(ValueError):
+        ShardManifest.build([archive], job, chunk_size=2)
+    assert job_status(job)['done'] == 1
@@ -0,0 +1,41 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA_DIR
+from dstvparser.render.svg_renderer import SVGThumbnailCache, render_job
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_render_job_skips_bad_files(tmp_path, max_workers):
+    shutil.copy(DATA_DIR / '722.nc', tmp_path / 'a.nc')
+    (tmp_path / 'bad.nc').write_text('non DSTV\n')
+    (tmp_path / 'notes.txt').write_text('x')
+    paths = [str(tmp_path / name) for name in ('a.nc', 'bad.nc', 'notes.txt', 'missing.nc')]
+    cache = SVGThumbnailCache(tmp_path / 'cache')
+
+    results = render_job(paths, cache, max_workers=max_workers)
+    assert [results[p] is None for p in paths] == [False, True, True, True]
+    assert results[paths[0]][1] is False
+    assert render_job(paths[:1], cache)[paths[0]][1] is True
+
+
+def test_put_removes_temporary_file_on_failure(tmp_path):
+    cache = SVGThumbnailCache(tmp_path)
+    key = cache.key(b'x')
+    with pytest.raises(UnicodeEncodeError):
+        cache.put(key, '\ud800')     # surrogato: non codificabile in UTF-8
+    assert list(tmp_path.rglob('*')) == [tmp_path / key[:2]]
+    assert cache.get(key) is None
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = SVGThumbnailCache(tmp_path)
+    keys = [cache.key(bytes([i])) for i in range(3)]
+    for i, key in enumerate(keys):
+        path = cache.put(key, 'x' * 100)
+        os.utime(path, (i, i))
+    cache.touch(keys[0])
+    assert cache.evict(max_bytes=250) == 1
+    assert [cache.get(k) is not None for k in keys] == [True, False, True]
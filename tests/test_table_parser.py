@@ -0,0 +1,33 @@
+import pytest
+
+from dstvparser.parsers.table_parser import TableDrivenParser
+
+
+def _with_profile_type(data: bytes, profile_type: bytes) -> bytes:
+    return data.replace(b'\n  I\n', b'\n  ' + profile_type + b'\n', 1)
+
+
+@pytest.mark.parametrize('profile_type', ['RO', 'RU'])
+def test_two_letter_profile_types(nc_bytes, profile_type):
+    part = TableDrivenParser('part.nc').parse_bytes(_with_profile_type(nc_bytes, profile_type.encode()))
+    assert part is not None
+    assert part.profile_type == profile_type
+    assert len(part.holes) == 4
+
+
+def test_round_tube_dimensions(nc_bytes):
+    part = TableDrivenParser('part.nc').parse_bytes(_with_profile_type(nc_bytes, b'RO'))
+    assert set(part.dimensions) == {'radious', 'thickness'}
+
+
+def test_two_letter_piece_id(nc_bytes):
+    part = TableDrivenParser('part.nc').parse_bytes(nc_bytes.replace(b'\n  722\n  722\n', b'\n  E1\n  E1\n', 1))
+    assert part.piece_id == 'E1'
+    assert part.code_profile == 'HEB100'
+    assert len(part.holes) == 4
+
+
+def test_nc1_sample(nc1_bytes):
+    part = TableDrivenParser('part.nc1').parse_bytes(nc1_bytes)
+    assert part is not None
+    assert part.code_profile == 'HEA200'